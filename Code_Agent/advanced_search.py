@@ -13,9 +13,12 @@ Advanced Search - 클로드 코드 수준의 강력한 검색 시스템
 import os
 import re
 import ast
+import json
 import fnmatch
+import tempfile
 import hashlib
 import threading
+import multiprocessing
 from pathlib import Path
 from typing import (
     Optional, List, Dict, Any, Set, Tuple,
@@ -24,7 +27,7 @@ from typing import (
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import time
 
 
@@ -33,13 +36,20 @@ import time
 # =============================================================================
 
 # 무시할 디렉토리
-IGNORE_DIRS = {
+IGNORE_DIRS = frozenset({
     '.git', 'node_modules', '__pycache__', '.venv', 'venv', 'env',
     'dist', 'build', '.next', '.nuxt', 'coverage', '.idea', '.vscode',
     'vendor', 'target', 'bin', 'obj', '.cache', '.pytest_cache',
     '.mypy_cache', '.tox', 'eggs', '*.egg-info', '.eggs',
     'htmlcov', '.hypothesis', '.nox', '.ruff_cache'
-}
+})
+
+# 심볼 디스크 캐시 (워크스페이스 기준 경로, 숨김 디렉토리라 인덱싱 대상에서 제외됨)
+SYMBOL_CACHE_FILE = os.path.join('.maeum_cache', 'symbols.json')
+SYMBOL_CACHE_VERSION = 1
+
+# 심볼을 추출하는 확장자 (Python, JavaScript/TypeScript)
+SYMBOL_EXTENSIONS = frozenset({'.py', '.js', '.ts', '.jsx', '.tsx'})
 
 # 무시할 파일 패턴
 IGNORE_FILES = {
@@ -173,6 +183,20 @@ class FileInfo:
 # File Type Detection
 # =============================================================================
 
+def compile_glob(*patterns: str) -> Callable[[str], Any]:
+    """glob 패턴(들) → 컴파일된 정규식 match
+
+    fnmatch.fnmatch 와 같은 규칙이지만 한 번만 컴파일하므로 파일마다
+    패턴을 다시 조회하지 않는다. 여러 패턴은 OR 로 합친다.
+    """
+    flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), flags).match
+
+
+# IGNORE_FILES 를 하나의 정규식으로 (파일마다 패턴 수만큼 fnmatch 하지 않도록)
+_match_ignored_file = compile_glob(*sorted(IGNORE_FILES))
+
+
 def detect_file_type(file_path: str) -> FileType:
     """파일 타입 감지"""
     path_lower = file_path.lower()
@@ -239,6 +263,122 @@ def get_file_priority(file_path: str) -> int:
     return 10
 
 
+# =============================================================================
+# Symbol Extraction
+# =============================================================================
+
+# 인덱싱 시 이 이상의 파일을 파싱해야 할 때만 프로세스 풀 사용 (작으면 기동 비용이 더 큼)
+PARALLEL_PARSE_MIN_FILES = 64
+
+# 파싱 프로세스 풀 시작 방식 (index_codebase 는 워커 스레드에서도 호출되므로 fork 금지)
+PARSE_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+JS_CLASS_PATTERN = re.compile(r'class\s+(\w+)')
+JS_FUNCTION_PATTERNS = (
+    re.compile(r'function\s+(\w+)\s*\('),
+    re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\('),
+    re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?function'),
+    re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>'),
+)
+
+
+def get_decorator_name(decorator) -> str:
+    """데코레이터 이름 추출"""
+    if isinstance(decorator, ast.Name):
+        return decorator.id
+    elif isinstance(decorator, ast.Attribute):
+        return decorator.attr
+    elif isinstance(decorator, ast.Call):
+        return get_decorator_name(decorator.func)
+    return ""
+
+
+def extract_python_symbols(content: str) -> List[Dict[str, Any]]:
+    """Python 심볼 추출"""
+    symbols = []
+
+    try:
+        tree = ast.parse(content)
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                symbols.append({
+                    "type": "class",
+                    "name": node.name,
+                    "line": node.lineno,
+                    "decorators": [get_decorator_name(d) for d in node.decorator_list]
+                })
+            elif isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
+                symbols.append({
+                    "type": "function",
+                    "name": node.name,
+                    "line": node.lineno,
+                    "async": isinstance(node, ast.AsyncFunctionDef),
+                    "args": [a.arg for a in node.args.args],
+                    "decorators": [get_decorator_name(d) for d in node.decorator_list]
+                })
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        # 상수 (대문자)
+                        if target.id.isupper():
+                            symbols.append({
+                                "type": "constant",
+                                "name": target.id,
+                                "line": node.lineno
+                            })
+
+    except SyntaxError:
+        pass
+
+    return symbols
+
+
+def extract_js_symbols(content: str) -> List[Dict[str, Any]]:
+    """JavaScript/TypeScript 심볼 추출 (정규식 기반)"""
+    symbols = []
+
+    # 클래스
+    for match in JS_CLASS_PATTERN.finditer(content):
+        line = content[:match.start()].count('\n') + 1
+        symbols.append({
+            "type": "class",
+            "name": match.group(1),
+            "line": line
+        })
+
+    # 함수
+    for pattern in JS_FUNCTION_PATTERNS:
+        for match in pattern.finditer(content):
+            line = content[:match.start()].count('\n') + 1
+            symbols.append({
+                "type": "function",
+                "name": match.group(1),
+                "line": line
+            })
+
+    return symbols
+
+
+def extract_symbols(content: str, extension: str) -> List[Dict[str, Any]]:
+    """확장자에 맞는 심볼 추출"""
+    if extension == '.py':
+        return extract_python_symbols(content)
+    elif extension in ('.js', '.ts', '.jsx', '.tsx'):
+        return extract_js_symbols(content)
+    return []
+
+
+def _extract_file_symbols(path: str) -> Optional[List[Dict[str, Any]]]:
+    """프로세스 풀 작업 단위 (picklable): 파일 경로 → 심볼 목록 (읽기 실패 시 None)"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        return extract_symbols(content, os.path.splitext(path)[1])
+    except Exception:
+        return None
+
+
 # =============================================================================
 # Advanced Search Engine
 # =============================================================================
@@ -273,6 +413,10 @@ class SearchEngine:
         self._content_cache: Dict[str, str] = {}
         self._index_lock = threading.Lock()
 
+        # 심볼 디스크 캐시 {rel_path: (mtime_ns, size, symbols)} - 재시작 후에도 재파싱 생략
+        self._symbol_cache_path = self.root_path / SYMBOL_CACHE_FILE
+        self._disk_symbols: Optional[Dict[str, Tuple[int, int, List[Dict]]]] = None
+
         # 캐시
         self._search_cache: Dict[str, SearchResult] = {}
         self._cache_max_size = 100
@@ -302,6 +446,10 @@ class SearchEngine:
         symbol_count = 0
         errors = []
 
+        disk_symbols = self._load_symbol_cache()
+        fresh_symbols: Dict[str, Tuple[int, int, List[Dict]]] = {}
+        pending: List[Tuple[FileInfo, int, int]] = []  # 심볼 추출이 필요한 파일
+
         def index_file(file_path: Path) -> Optional[FileInfo]:
             nonlocal symbol_count
             try:
@@ -316,6 +464,8 @@ class SearchEngine:
                 if not force and rel_path in self._file_index:
                     existing = self._file_index[rel_path]
                     if existing.modified_time == stat.st_mtime:
+                        if file_path.suffix in SYMBOL_EXTENSIONS:
+                            fresh_symbols[rel_path] = (stat.st_mtime_ns, stat.st_size, existing.symbols)
                         return existing
 
                 file_info = FileInfo(
@@ -330,14 +480,16 @@ class SearchEngine:
                 )
 
                 # 심볼 추출 (Python, JavaScript만)
-                if file_path.suffix in ('.py', '.js', '.ts', '.jsx', '.tsx'):
-                    try:
-                        content = file_path.read_text(encoding='utf-8', errors='ignore')
-                        symbols = self._extract_symbols(content, file_path.suffix)
-                        file_info.symbols = symbols
-                        symbol_count += len(symbols)
-                    except Exception:
-                        pass
+                if file_path.suffix in SYMBOL_EXTENSIONS:
+                    cached = disk_symbols.get(rel_path)
+                    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        # 변경 없는 파일 - 디스크 캐시 재사용
+                        file_info.symbols = cached[2]
+                        symbol_count += len(cached[2])
+                        fresh_symbols[rel_path] = cached
+                    else:
+                        # 파싱은 CPU 바운드 → 아래에서 프로세스 풀로 일괄 처리
+                        pending.append((file_info, stat.st_mtime_ns, stat.st_size))
 
                 return file_info
 
@@ -361,9 +513,31 @@ class SearchEngine:
                 if on_progress and i % 100 == 0:
                     on_progress(i + 1, total_files, str(file_path))
 
+        # 심볼 추출 (파일이 많으면 프로세스 풀 - ast.parse 는 GIL 을 놓지 않음)
+        paths = [file_info.path for file_info, _, _ in pending]
+        if len(paths) >= PARALLEL_PARSE_MIN_FILES:
+            with ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context(PARSE_POOL_START_METHOD)
+            ) as executor:
+                extracted = list(executor.map(_extract_file_symbols, paths, chunksize=32))
+        else:
+            extracted = [_extract_file_symbols(path) for path in paths]
+
+        for (file_info, mtime_ns, size), symbols in zip(pending, extracted):
+            if symbols is None:
+                continue
+            file_info.symbols = symbols
+            symbol_count += len(symbols)
+            fresh_symbols[file_info.relative_path] = (mtime_ns, size, symbols)
+
         # 심볼 인덱스 구축
         self._build_symbol_index()
 
+        # 바뀐 항목이 있을 때만 디스크 캐시 갱신
+        if fresh_symbols != disk_symbols:
+            self._save_symbol_cache(fresh_symbols)
+
         elapsed = time.time() - start_time
 
         return {
@@ -384,7 +558,8 @@ class SearchEngine:
         context_lines: int = 2,
         case_sensitive: bool = False,
         whole_word: bool = False,
-        include_hidden: bool = False
+        include_hidden: bool = False,
+        files_only: bool = False
     ) -> SearchResult:
         """
         검색 실행
@@ -399,6 +574,7 @@ class SearchEngine:
             case_sensitive: 대소문자 구분
             whole_word: 단어 단위 매칭
             include_hidden: 숨김 파일 포함
+            files_only: 파일당 첫 매치만 수집 (max_results 는 파일 수 상한)
 
         Returns:
             SearchResult
@@ -406,7 +582,7 @@ class SearchEngine:
         start_time = time.time()
 
         # 캐시 확인
-        cache_key = f"{query}:{mode.value}:{file_pattern}:{case_sensitive}:{whole_word}"
+        cache_key = f"{query}:{mode.value}:{file_pattern}:{case_sensitive}:{whole_word}:{files_only}"
         if self.cache_enabled and cache_key in self._search_cache:
             cached = self._search_cache[cache_key]
             cached.elapsed_time = time.time() - start_time
@@ -421,7 +597,8 @@ class SearchEngine:
         else:
             matches = self._search_content(
                 query, target_files, mode,
-                context_lines, case_sensitive, whole_word, max_results
+                context_lines, case_sensitive, whole_word, max_results,
+                files_only
             )
 
         # 결과 정렬 (우선순위, 점수)
@@ -471,11 +648,11 @@ class SearchEngine:
             List[FileInfo]
         """
         results = []
+        match_pattern = compile_glob(pattern)
 
         for rel_path, file_info in self._file_index.items():
             # 패턴 매칭
-            if not fnmatch.fnmatch(file_info.name, pattern) and \
-               not fnmatch.fnmatch(rel_path, pattern):
+            if not match_pattern(file_info.name) and not match_pattern(rel_path):
                 continue
 
             # 타입 필터
@@ -601,21 +778,21 @@ class SearchEngine:
 
     def _walk_files(self) -> Generator[Path, None, None]:
         """파일 순회"""
-        for root, dirs, files in os.walk(self.root_path):
+        for root, dirs, files in os.walk(self.root_path, topdown=True, followlinks=False):
             # 무시할 디렉토리 제거
             dirs[:] = [d for d in dirs if d not in IGNORE_DIRS and not d.startswith('.')]
 
+            root_path = Path(root)
             for file in files:
                 # 무시할 파일 체크
-                if any(fnmatch.fnmatch(file, pattern) for pattern in IGNORE_FILES):
+                if _match_ignored_file(file):
                     continue
 
-                # 확장자 체크
-                file_path = Path(root) / file
-                if file_path.suffix.lower() not in SEARCHABLE_EXTENSIONS:
+                # 확장자 체크 (Path 생성 전에)
+                if os.path.splitext(file)[1].lower() not in SEARCHABLE_EXTENSIONS:
                     continue
 
-                yield file_path
+                yield root_path / file
 
     def _select_files(
         self,
@@ -625,12 +802,12 @@ class SearchEngine:
     ) -> List[str]:
         """검색 대상 파일 선택"""
         results = []
+        match_pattern = compile_glob(file_pattern) if file_pattern else None
 
         for rel_path, file_info in self._file_index.items():
             # 패턴 필터
-            if file_pattern:
-                if not fnmatch.fnmatch(file_info.name, file_pattern) and \
-                   not fnmatch.fnmatch(rel_path, file_pattern):
+            if match_pattern:
+                if not match_pattern(file_info.name) and not match_pattern(rel_path):
                     continue
 
             # 타입 필터
@@ -656,7 +833,8 @@ class SearchEngine:
         context_lines: int,
         case_sensitive: bool,
         whole_word: bool,
-        max_results: int
+        max_results: int,
+        files_only: bool = False
     ) -> List[SearchMatch]:
         """내용 검색"""
         matches = []
@@ -711,6 +889,9 @@ class SearchEngine:
                             score=1.0 if mode == SearchMode.EXACT else 0.9
                         ))
 
+                        if files_only:
+                            return file_matches
+
                         if len(file_matches) >= max_results // 10:
                             break
 
@@ -728,6 +909,9 @@ class SearchEngine:
                 matches.extend(file_matches)
 
                 if len(matches) >= max_results:
+                    # 아직 시작 안 한 파일은 취소 (with 종료 시 대기하지 않도록)
+                    for pending in futures:
+                        pending.cancel()
                     break
 
         return matches
@@ -758,96 +942,57 @@ class SearchEngine:
 
     def _extract_symbols(self, content: str, extension: str) -> List[Dict[str, Any]]:
         """심볼 추출"""
-        symbols = []
-
-        if extension == '.py':
-            symbols = self._extract_python_symbols(content)
-        elif extension in ('.js', '.ts', '.jsx', '.tsx'):
-            symbols = self._extract_js_symbols(content)
-
-        return symbols
+        return extract_symbols(content, extension)
 
     def _extract_python_symbols(self, content: str) -> List[Dict[str, Any]]:
         """Python 심볼 추출"""
-        symbols = []
-
-        try:
-            tree = ast.parse(content)
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    symbols.append({
-                        "type": "class",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "decorators": [self._get_decorator_name(d) for d in node.decorator_list]
-                    })
-                elif isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
-                    symbols.append({
-                        "type": "function",
-                        "name": node.name,
-                        "line": node.lineno,
-                        "async": isinstance(node, ast.AsyncFunctionDef),
-                        "args": [a.arg for a in node.args.args],
-                        "decorators": [self._get_decorator_name(d) for d in node.decorator_list]
-                    })
-                elif isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            # 상수 (대문자)
-                            if target.id.isupper():
-                                symbols.append({
-                                    "type": "constant",
-                                    "name": target.id,
-                                    "line": node.lineno
-                                })
-
-        except SyntaxError:
-            pass
-
-        return symbols
+        return extract_python_symbols(content)
 
     def _extract_js_symbols(self, content: str) -> List[Dict[str, Any]]:
         """JavaScript/TypeScript 심볼 추출 (정규식 기반)"""
-        symbols = []
+        return extract_js_symbols(content)
 
-        # 클래스
-        for match in re.finditer(r'class\s+(\w+)', content):
-            line = content[:match.start()].count('\n') + 1
-            symbols.append({
-                "type": "class",
-                "name": match.group(1),
-                "line": line
-            })
+    def _get_decorator_name(self, decorator) -> str:
+        """데코레이터 이름 추출"""
+        return get_decorator_name(decorator)
 
-        # 함수
-        patterns = [
-            r'function\s+(\w+)\s*\(',
-            r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\(',
-            r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?function',
-            r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>',
-        ]
-
-        for pattern in patterns:
-            for match in re.finditer(pattern, content):
-                line = content[:match.start()].count('\n') + 1
-                symbols.append({
-                    "type": "function",
-                    "name": match.group(1),
-                    "line": line
-                })
+    def _load_symbol_cache(self) -> Dict[str, Tuple[int, int, List[Dict]]]:
+        """심볼 디스크 캐시 로드 (없거나 손상/버전 불일치면 빈 캐시)"""
+        if self._disk_symbols is not None:
+            return self._disk_symbols
 
-        return symbols
+        self._disk_symbols = {}
+        try:
+            with open(self._symbol_cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == SYMBOL_CACHE_VERSION:
+                self._disk_symbols = {
+                    rel_path: (entry[0], entry[1], entry[2])
+                    for rel_path, entry in data.get("files", {}).items()
+                }
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            pass
+        return self._disk_symbols
 
-    def _get_decorator_name(self, decorator) -> str:
-        """데코레이터 이름 추출"""
-        if isinstance(decorator, ast.Name):
-            return decorator.id
-        elif isinstance(decorator, ast.Attribute):
-            return decorator.attr
-        elif isinstance(decorator, ast.Call):
-            return self._get_decorator_name(decorator.func)
-        return ""
+    def _save_symbol_cache(self, entries: Dict[str, Tuple[int, int, List[Dict]]]):
+        """심볼 디스크 캐시 저장 (임시 파일 + os.replace 로 원자적 교체)"""
+        self._disk_symbols = entries
+        try:
+            cache_dir = self._symbol_cache_path.parent
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(cache_dir), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "version": SYMBOL_CACHE_VERSION,
+                        "files": {rel_path: list(entry) for rel_path, entry in entries.items()}
+                    }, f, ensure_ascii=False)
+                os.replace(tmp_path, self._symbol_cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
 
     def _build_symbol_index(self):
         """심볼 인덱스 구축"""
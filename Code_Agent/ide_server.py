@@ -13,40 +13,77 @@ MAEUM_CODE Web IDE - Backend Server
 포트: 8880 (AI 서버 7860과 분리)
 """
 
+import io
 import os
+import re
+import ast
 import sys
 import json
+import locale
 import asyncio
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+import time
+import contextlib
 import mimetypes
 import httpx
+import requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass, field
+from stat import S_ISDIR, S_ISREG
+from typing import Optional, List, Dict, Any, ClassVar
 from datetime import datetime
+from collections import deque, Counter
+from itertools import islice
 
 # FastAPI
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uvicorn
 
+# 선택 의존성: 정규식 DFA 엔진 (없으면 re 사용)
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# POSIX 전용: 동시 쓰기 보호용 advisory lock (Windows 에서는 생략)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 선택 의존성: 빠른 JSON (없으면 json 사용)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 경로 설정
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(SCRIPT_DIR)
+STATIC_DIR = Path(SCRIPT_DIR) / "static"  # 정적 파일 (오프라인 지원)
+IDE_TEMPLATE_PATH = os.path.join(SCRIPT_DIR, 'ide_template.html')  # 없으면 IDE_HTML 사용
 if PARENT_DIR not in sys.path:
     sys.path.insert(0, PARENT_DIR)
 
 # MAEUM_CODE 모듈
 try:
     from .stream_client import SmartClient, check_server
-    from .advanced_search import SearchEngine, SearchMode, SearchResult
+    from .advanced_search import SearchEngine, SearchMode, SearchResult, compile_glob
     from .code_tools import TransactionManager, get_tx_manager, BatchEditor, CodeEditor
     from .classifier import ActionClassifier, ActionType
     from .code_writer import CodeWriter, check_ai_status
 except ImportError:
     from stream_client import SmartClient, check_server
-    from advanced_search import SearchEngine, SearchMode, SearchResult
+    from advanced_search import SearchEngine, SearchMode, SearchResult, compile_glob
     from code_tools import TransactionManager, get_tx_manager, BatchEditor, CodeEditor
     from classifier import ActionClassifier, ActionType
     from code_writer import CodeWriter, check_ai_status
@@ -94,6 +131,13 @@ class ChatMessage(BaseModel):
     message: str
     context: Optional[str] = None
 
+# 단계별 대기 상한 (초) - 도구 하나당 최대 두 번 대기하므로 루프가 멈춘 것처럼 보이지 않게 제한
+UI_STEP_DELAY_MAX = 5.0
+
+class UIPacing(BaseModel):
+    # 도구 실행 단계 사이 대기 (초, 0 ~ UI_STEP_DELAY_MAX, inf/nan 거부)
+    step_delay: float = Field(0.0, ge=0.0, le=UI_STEP_DELAY_MAX, allow_inf_nan=False)
+
 
 # ============================================================
 # Tool Definitions (Agentic Loop)
@@ -579,7 +623,7 @@ TOOLS = [
             "properties": {
                 "file_path": {
                     "type": "string",
-                    "description": "분석할 파일 경로"
+                    "description": "분석할 파일 경로 (디렉토리면 하위 .py 파일 일괄 분석)"
                 },
                 "analysis_type": {
                     "type": "string",
@@ -661,394 +705,1300 @@ TOOLS = [
 ]
 
 
+def _dump_json_bytes(obj: Any) -> bytes:
+    """들여쓰기 2칸 JSON 직렬화 (UTF-8 bytes, orjson 우선)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _dump_json_str(obj: Any) -> str:
+    """압축 JSON 문자열 직렬화 (orjson 우선, 비ASCII 그대로 - WebSocket send_json 과 같은 형식)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load_json_bytes(data) -> Any:
+    """JSON 역직렬화 (orjson 우선, bytes/str 모두 가능)
+
+    Raises:
+        ValueError: JSON 형식 오류 (orjson/json 모두 ValueError 하위 클래스)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _canonical_json(obj: Any):
+    """키 정렬 JSON (중복 비교용 해시 키, orjson 우선)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False)
+
+
+def _read_stream_limited(response, max_bytes: int) -> tuple:
+    """스트리밍 응답에서 max_bytes 까지만 읽기
+
+    Returns:
+        (bytes, 끝까지 읽었는지 여부)
+    """
+    chunks = []
+    received = 0
+    for chunk in response.iter_content(chunk_size=8192):
+        chunks.append(chunk)
+        received += len(chunk)
+        if received >= max_bytes:
+            return b"".join(chunks)[:max_bytes], False
+    return b"".join(chunks), True
+
+
+# _file_lock 의 lock 파일 위치 (대상 파일 디렉토리 기준, 심볼 캐시와 같은 서버 전용 디렉토리)
+LOCK_DIR = os.path.join('.maeum_cache', 'locks')
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """path 에 대한 배타 lock (읽기-수정-쓰기 구간 보호)
+
+    대상 파일은 rename 으로 교체되므로 대상 자체가 아닌 별도 lock 파일을 잠근다.
+    lock 파일은 사용자 파일 옆이 아니라 서버 전용 .maeum_cache/locks/ 아래에 둔다.
+    fcntl 이 없는 플랫폼에서는 아무것도 하지 않는다.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    directory, name = os.path.split(path)
+    lock_dir = os.path.join(directory, LOCK_DIR)
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{name}.lock"), 'a') as lock_fp:
+        fcntl.flock(lock_fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """임시 파일에 쓰고 fsync 후 os.replace (중간에 죽어도 기존 파일 유지)"""
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 은 0600 으로 만들므로 기존 권한(없으면 0644) 유지
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_write_json(path: str, obj: Any):
+    """JSON 원자적 쓰기 (lock + 임시 파일 + rename)"""
+    data = _dump_json_bytes(obj)
+    with _file_lock(path):
+        _atomic_write_bytes(path, data)
+
+
+# git status XY 코드 → 이름
+GIT_STATUS_NAMES = {
+    'M': 'modified', 'T': 'type changed', 'A': 'added', 'D': 'deleted',
+    'R': 'renamed', 'C': 'copied', 'U': 'unmerged'
+}
+
+
+def _parse_git_status_v2(raw: bytes) -> tuple:
+    """`git status --porcelain=v2 -z --branch` 출력 파싱 (NUL 구분, 단일 패스)
+
+    Returns:
+        (branch, changes) - branch 는 "head...upstream [ahead N, behind M]" 형식
+    """
+    head = "unknown"
+    upstream = ""
+    ahead_behind = ""
+    changes = []
+
+    records = raw.decode('utf-8', errors='replace').split('\0')
+    i = 0
+    while i < len(records):
+        rec = records[i]
+        i += 1
+        if not rec:
+            continue
+
+        kind = rec[0]
+        if kind == '#':
+            key, _, value = rec[2:].partition(' ')
+            if key == 'branch.head':
+                head = value
+            elif key == 'branch.upstream':
+                upstream = value
+            elif key == 'branch.ab':
+                ahead, behind = value.split(' ')
+                parts = [f"ahead {ahead[1:]}" if ahead != '+0' else "",
+                         f"behind {behind[1:]}" if behind != '-0' else ""]
+                ahead_behind = ", ".join(p for p in parts if p)
+
+        elif kind in '12':
+            # 1 XY sub mH mI mW hH hI path
+            # 2 XY sub mH mI mW hH hI Xscore path \0 origPath
+            fields = rec.split(' ', 9 if kind == '2' else 8)
+            x, y = fields[1]
+            change = {"file": fields[-1]}
+            if x != '.':
+                change["status"] = GIT_STATUS_NAMES.get(x, x)
+            else:
+                change["status"] = f"{GIT_STATUS_NAMES.get(y, y)} (unstaged)"
+            if kind == '2':
+                change["from"] = records[i]
+                i += 1
+            changes.append(change)
+
+        elif kind == 'u':
+            changes.append({"file": rec.split(' ', 10)[-1], "status": "unmerged"})
+
+        elif kind == '?':
+            changes.append({"file": rec[2:], "status": "untracked"})
+
+    branch = head
+    if upstream:
+        branch += f"...{upstream}"
+    if ahead_behind:
+        branch += f" [{ahead_behind}]"
+    return branch, changes
+
+
+# MAEUM.md 섹션 헤더
+MEMORY_SECTION_HEADERS = {
+    "architecture": "## Architecture (아키텍처)",
+    "patterns": "## Patterns (패턴)",
+    "rules": "## Rules (규칙)",
+    "context": "## Context (맥락)",
+    "decisions": "## Decisions (결정)"
+}
+
+
+def _compile_section_pattern(header: str) -> "re.Pattern":
+    """헤더부터 다음 ## 직전까지를 잡는 정규식"""
+    return re.compile(rf'({re.escape(header)}.*?)(?=\n##|\Z)', re.DOTALL)
+
+
+# search_code 에서 건너뛸 디렉토리 / 바이너리 확장자 / 최대 파일 크기
+SEARCH_IGNORE_DIRS = frozenset({
+    'node_modules', '__pycache__', 'venv', '.git', '.venv', 'dist', 'build', 'target'
+})
+BINARY_EXTENSIONS = frozenset({
+    '.pyc', '.pyo', '.so', '.dll', '.dylib', '.exe', '.bin', '.o', '.a', '.class', '.jar',
+    '.zip', '.tar', '.gz', '.bz2', '.xz', '.7z', '.rar', '.whl', '.egg',
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp',
+    '.mp3', '.mp4', '.wav', '.avi', '.mov', '.pdf',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.db', '.sqlite', '.pkl', '.npy', '.npz', '.pt', '.onnx', '.gguf', '.safetensors'
+})
+SEARCH_MAX_FILE_SIZE = 32 * 1024 * 1024  # 32MB
+SNIFF_SIZE = 4096
+
+
+def _iter_search_files(workspace: str, match_name):
+    """search_code 대상 파일 순회 (scandir 기반)
+
+    숨김/무시 디렉토리, 바이너리 확장자, 대용량 파일은 열어보기 전에 제외한다.
+    크기는 DirEntry.stat() 으로 얻는다 (Windows 에서는 추가 syscall 없음).
+
+    Yields:
+        (절대 경로, 워크스페이스 기준 상대 경로)
+    """
+    stack = [(workspace, "")]
+    while stack:
+        root, rel_root = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in SEARCH_IGNORE_DIRS:
+                        subdirs.append((entry.path, rel_root + name + os.sep))
+                    continue
+                if not entry.is_file() or not match_name(name):
+                    continue
+                if os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS:
+                    continue
+                if entry.stat().st_size > SEARCH_MAX_FILE_SIZE:
+                    continue
+            except OSError:
+                continue
+            yield entry.path, rel_root + name
+
+        # os.walk(topdown) 과 같은 순서로 하위 디렉토리 방문
+        stack.extend(reversed(subdirs))
+
+
+class _HyperscanPattern:
+    """hyperscan 블록 모드 DB (선형 시간 스캔, 매치 시작 오프셋만 제공)
+
+    UTF8 모드이므로 유효한 UTF-8 만 스캔해야 함 (_search_file 은 디코딩 후 다시 인코딩한 bytes 전달)
+    """
+
+    MAX_MATCHES = 4096
+
+    def __init__(self, pattern: bytes):
+        self.db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self.db.compile(
+            expressions=[pattern],
+            ids=[0],
+            elements=1,
+            # UTF8 | UCP: '.', \w, 대소문자 무시를 바이트가 아닌 유니코드 문자 기준으로 (re 와 같은 의미)
+            flags=[
+                hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SOM_LEFTMOST
+                | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+            ]
+        )
+
+    def match_starts(self, buf: bytes) -> List[int]:
+        starts = []
+
+        def on_match(match_id, start, end, flags, context):
+            if len(starts) < self.MAX_MATCHES:
+                starts.append(start)
+
+        self.db.scan(buf, match_event_handler=on_match)
+        # hyperscan 은 끝 오프셋 순으로 보고하므로 정렬
+        return sorted(set(starts))
+
+
+# 전체 버퍼에서의 매치가 줄 단위 검색보다 좁아질 수 있는 요소 (줄 끝/문자열 경계/부정 탐색)
+# → 이런 쿼리는 후보 탐색 없이 줄 단위로만 검색
+LINE_ONLY_SEARCH_TOKENS = ('$', '\\Z', '\\A', '\\B', '(?!', '(?<!')
+
+
+@dataclass(slots=True)
+class _SearchPattern:
+    """search_code 쿼리
+
+    line_regex: 줄 하나에 대한 판정 (기존 라인별 re.search 와 같은 의미)
+    scanner: 파일 전체에서 후보 위치를 찾는 re(MULTILINE)/hyperscan 패턴, None 이면 줄 단위 검색
+    """
+    line_regex: re.Pattern
+    scanner: Any = None
+
+
+def _compile_search_pattern(query: str) -> _SearchPattern:
+    """search_code 패턴 컴파일 (str 정규식) - 후보 탐색은 hyperscan 우선, 미설치/미지원 패턴은 re
+
+    Raises:
+        re.error: 정규식 문법 오류
+    """
+    line_regex = re.compile(query, re.IGNORECASE)
+    if any(token in query for token in LINE_ONLY_SEARCH_TOKENS):
+        return _SearchPattern(line_regex)
+    if hyperscan is not None:
+        try:
+            return _SearchPattern(line_regex, _HyperscanPattern(query.encode('utf-8')))
+        except hyperscan.error:
+            pass  # 역참조/전후방 탐색 등 미지원 → re
+    return _SearchPattern(line_regex, re.compile(query, re.IGNORECASE | re.MULTILINE))
+
+
+def _search_file(file_path: str, rel_path: str, pattern: _SearchPattern, limit: int) -> List[dict]:
+    """search_code 단일 파일 검색 (str 정규식, 매치된 라인당 1건)
+
+    파일을 한 번 디코딩한 뒤 전체를 스캔해 후보 위치를 찾고, 후보가 있는 줄만
+    line_regex 로 다시 확인한다 (\\s, [^;]* 등이 줄을 넘어 매치돼도 결과는 라인별 검색과 같음).
+    라인 번호는 직전 후보 이후의 개행만 세어 누적한다.
+    """
+    with open(file_path, 'rb') as fp:
+        buf = fp.read(SNIFF_SIZE)
+        if b'\x00' in buf:
+            return []  # 바이너리
+        buf += fp.read()
+
+    text = buf.decode('utf-8', errors='replace').replace('\r\n', '\n')
+    line_regex = pattern.line_regex
+    scanner = pattern.scanner
+    results = []
+
+    if scanner is None:
+        for line_no, line in enumerate(io.StringIO(text), 1):
+            if line_regex.search(line):
+                results.append({"file": rel_path, "line": line_no, "content": line.strip()[:100]})
+                if len(results) >= limit:
+                    break
+        return results
+
+    if isinstance(scanner, re.Pattern):
+        doc, nl = text, '\n'
+
+        def next_start(pos: int) -> int:
+            m = scanner.search(text, pos)
+            return m.start() if m else -1
+    else:
+        # hyperscan 은 bytes 오프셋을 주므로 같은 내용의 UTF-8 bytes 위에서 줄 경계를 찾음
+        doc, nl = text.encode('utf-8'), b'\n'
+        starts = iter(scanner.match_starts(doc))
+
+        def next_start(pos: int) -> int:
+            for start in starts:
+                if start >= pos:
+                    return start
+            return -1
+
+    line_no = 1
+    scanned = 0
+    pos = 0
+    while len(results) < limit and pos < len(doc):
+        start = next_start(pos)
+        if start < 0 or start >= len(doc):
+            break  # 마지막 개행 뒤의 빈 위치는 줄이 아님
+        line_no += doc.count(nl, scanned, start)
+        scanned = start
+
+        line_start = doc.rfind(nl, 0, start) + 1
+        line_end = doc.find(nl, start)
+        pos = len(doc) if line_end < 0 else line_end + 1
+        line = doc[line_start:pos]
+        if nl == b'\n':
+            line = line.decode('utf-8')
+
+        if line_regex.search(line):
+            results.append({"file": rel_path, "line": line_no, "content": line.strip()[:100]})
+
+    return results
+
+
+# 후보 파일이 이 이상일 때만 프로세스 풀 사용 (작은 검색은 직렬이 더 빠름)
+SEARCH_PARALLEL_MIN_FILES = 64
+
+# tx_manager 를 쓰는 도구 - 워커 스레드가 아닌 이벤트 루프 스레드에서 실행 (execute_async)
+LOOP_THREAD_TOOLS = frozenset({"multi_edit"})
+
+# 검색 프로세스 풀 워커 시작 방식 (fork 는 스레드가 있는 프로세스에서 안전하지 않음)
+SEARCH_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# 워커 프로세스마다 쿼리별로 한 번만 컴파일
+_cached_search_pattern = lru_cache(maxsize=32)(_compile_search_pattern)
+
+
+def _scan_file(job: tuple) -> List[dict]:
+    """프로세스 풀 작업 단위 (picklable): (query, file_path, rel_path) → 매치 목록"""
+    query, file_path, rel_path = job
+    try:
+        return _search_file(file_path, rel_path, _cached_search_pattern(query), 50)
+    except OSError:
+        return []
+
+
+# 문(statement)을 담을 수 있는 노드 타입 - 정의/import 는 이 안에만 나타남
+AST_STMT_TYPES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+
+def _iter_statements(tree):
+    """ast.walk 와 같은 순서(BFS)로 문(statement) 노드만 순회 - 표현식 하위 트리는 건너뜀"""
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        todo.extend(child for child in ast.iter_child_nodes(node) if isinstance(child, AST_STMT_TYPES))
+        yield node
+
+
+class _AnalyzeVisitor(ast.NodeVisitor):
+    """analyze_code 수집기 - 클래스/함수/import 를 한 번의 순회로 수집
+
+    클래스/함수/import 정의는 문(statement) 안에만 올 수 있으므로
+    문 리스트 필드만 따라 내려가고 표현식 하위 트리는 건너뜀
+    """
+
+    # 하위 문(statement)을 담는 필드 (ExceptHandler / match_case 포함)
+    STMT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+    def __init__(self):
+        self._dispatch = {}  # 노드 타입 → visit_* 메서드 (인스턴스 재사용 시 계속 유효)
+        self.reset()
+
+    def reset(self):
+        """새 결과 컨테이너로 교체
+
+        이전 결과 리스트는 _analyze_source 캐시에 그대로 보관되므로 clear() 하지 않는다.
+        """
+        self.classes = []
+        self.functions = []
+        self.imports = {}  # 삽입 순서를 유지하는 중복 제거용 dict
+        self.spans = {}  # 심볼 이름 / Class.method → (시작 줄, 끝 줄)
+        self._scope = []
+
+    def visit(self, node):
+        cls = node.__class__
+        try:
+            method = self._dispatch[cls]
+        except KeyError:
+            method = self._dispatch[cls] = getattr(self, 'visit_' + cls.__name__, self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        for name in self.STMT_FIELDS:
+            for child in getattr(node, name, ()):
+                self.visit(child)
+
+    def _add_span(self, node):
+        span = (node.lineno, node.end_lineno)
+        self.spans.setdefault(node.name, span)
+        if self._scope:
+            self.spans.setdefault('.'.join(self._scope + [node.name]), span)
+
+    def _visit_scope(self, node):
+        self._scope.append(node.name)
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_ClassDef(self, node):
+        self.classes.append(node.name)
+        self._add_span(node)
+        self._visit_scope(node)
+
+    def visit_FunctionDef(self, node):
+        self.functions.append(node.name)
+        self._add_span(node)
+        self._visit_scope(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports[alias.name] = None
+
+    def visit_ImportFrom(self, node):
+        self.imports[node.module or ''] = None
+
+
+_analyze_tls = threading.local()
+
+
+def _get_analyze_visitor() -> _AnalyzeVisitor:
+    """스레드별로 재사용하는 _AnalyzeVisitor (결과 컨테이너는 매번 새로)"""
+    visitor = getattr(_analyze_tls, 'visitor', None)
+    if visitor is None:
+        visitor = _analyze_tls.visitor = _AnalyzeVisitor()
+    else:
+        visitor.reset()
+    return visitor
+
+
+@dataclass(slots=True)
+class CodeAnalysis:
+    """analyze_code 결과 (JSON 응답 직전에만 dict 로 변환)"""
+    lines: int
+    size: int
+    classes: Optional[list] = None
+    functions: Optional[list] = None
+    imports: Optional[list] = None
+    complexity: Optional[str] = None
+    syntax_error: Optional[str] = None
+    spans: dict = field(default_factory=dict)  # explain_code 심볼 위치 조회용 (응답에는 미포함)
+
+    RESULT_FIELDS: ClassVar[tuple] = ("lines", "size", "classes", "functions", "imports", "complexity", "syntax_error")
+
+    def to_dict(self) -> dict:
+        """응답용 dict - 값이 없는 필드는 제외, 리스트는 복사하지 않음 (asdict 의 deepcopy 회피)"""
+        result = {}
+        for name in self.RESULT_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        return result
+
+
+# 이보다 큰 파일(번들/minified 등)은 심볼 추출을 건너뜀
+SYMBOL_PARSE_MAX_CHARS = 512_000
+SYMBOL_PARSE_MAX_LINES = 20_000
+
+
+@dataclass(slots=True)
+class SymbolInfo:
+    """심볼 하나 (클래스/함수/import) - read_file 시 symbol_index 에 누적되므로 dict 대신 슬롯 객체"""
+    name: str
+    line: int
+    args: Optional[List[str]] = None  # Python 함수 인자
+    methods: Optional[List["SymbolInfo"]] = None  # Python 클래스 메서드
+
+    def to_dict(self) -> dict:
+        result = {"name": self.name, "line": self.line}
+        if self.args is not None:
+            result["args"] = self.args
+        if self.methods is not None:
+            result["methods"] = [m.to_dict() for m in self.methods]
+        return result
+
+
+@dataclass(slots=True)
+class FileSymbols:
+    """파일별 심볼 목록 (symbol_index 값)"""
+    file: str
+    lines: int
+    imports: List[SymbolInfo] = field(default_factory=list)
+    classes: List[SymbolInfo] = field(default_factory=list)
+    functions: List[SymbolInfo] = field(default_factory=list)
+    variables: List[SymbolInfo] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """도구 결과용 dict (기존 응답 형식 유지)"""
+        result = {
+            "file": self.file,
+            "lines": self.lines,
+            "imports": [s.to_dict() for s in self.imports],
+            "classes": [s.to_dict() for s in self.classes],
+            "functions": [s.to_dict() for s in self.functions],
+            "variables": [s.to_dict() for s in self.variables]
+        }
+        if self.error is not None:
+            result["error"] = self.error
+        return result
+
+
+@lru_cache(maxsize=512)
+def _analyze_source(full_path: str, mtime_ns: int, size: int) -> CodeAnalysis:
+    """analyze_code 결과 캐시 - (경로, mtime, 크기)가 같으면 재파싱하지 않음"""
+    # 바이트 그대로 읽어 ast.parse 에 전달 (디코딩/인코딩 선언 처리는 파서가 C 에서 수행)
+    with open(full_path, 'rb') as f:
+        source = f.read()
+
+    result = CodeAnalysis(lines=source.count(b'\n') + 1, size=len(source))
+
+    # Python 분석
+    if full_path.endswith('.py'):
+        if b'def' not in source and b'class' not in source and b'import' not in source:
+            # 정의/import 가 있을 수 없는 파일 - 파싱 없이 빈 결과
+            result.classes, result.functions, result.imports = [], [], []
+            result.complexity = "low"
+            return result
+
+        try:
+            tree = ast.parse(source, filename=full_path, type_comments=False)
+            visitor = _get_analyze_visitor()
+            visitor.visit(tree)
+            n_functions = len(visitor.functions)
+
+            result.classes = visitor.classes
+            result.functions = visitor.functions
+            result.imports = list(visitor.imports)
+            result.spans = visitor.spans
+            result.complexity = "high" if n_functions > 20 else "medium" if n_functions > 10 else "low"
+
+        except SyntaxError as e:
+            result.syntax_error = str(e)
+
+    return result
+
+
+# analyze_code 디렉토리 모드에서 분석할 최대 파일 수
+ANALYZE_BATCH_MAX_FILES = 200
+
+
+def _analyze_file_job(full_path: str) -> dict:
+    """프로세스 풀 작업 단위 (picklable): 파일 경로 → analyze_code 결과"""
+    try:
+        st = os.stat(full_path)
+        return _analyze_source(full_path, st.st_mtime_ns, st.st_size).to_dict()
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return {"error": str(e)}
+
+
+# explain_code 가 돌려주는 코드 최대 길이
+EXPLAIN_MAX_CHARS = 5000
+SOURCE_CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=128)
+def _read_source_head(full_path: str, mtime_ns: int, size: int) -> tuple:
+    """explain_code 용: 앞부분 EXPLAIN_MAX_CHARS 자와 전체 줄 수 (변경되지 않은 파일은 다시 읽지 않음)"""
+    with open(full_path, 'rb') as f:
+        # UTF-8 은 문자당 최대 4바이트 → 이만큼만 디코딩
+        raw = f.read(EXPLAIN_MAX_CHARS * 4)
+        newlines = raw.count(b'\n')
+        last = raw[-1:]
+        # 나머지는 디코딩 없이 줄 수만 셈
+        for chunk in iter(lambda: f.read(SOURCE_CHUNK_SIZE), b''):
+            newlines += chunk.count(b'\n')
+            last = chunk[-1:]
+    line_count = newlines + (1 if last and last != b'\n' else 0)
+    head = raw.decode('utf-8', errors='replace').replace('\r\n', '\n')[:EXPLAIN_MAX_CHARS]
+    return head, line_count
+
+
+@lru_cache(maxsize=128)
+def _read_source_window(full_path: str, mtime_ns: int, size: int, line_start: int, line_end: int) -> str:
+    """explain_code 용: line_end 번째 줄이 나올 때까지만 청크 단위로 읽음"""
+    start = max(line_start - 1, 0)
+    buf = bytearray()
+    newlines = 0
+    with open(full_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(SOURCE_CHUNK_SIZE), b''):
+            buf += chunk
+            newlines += chunk.count(b'\n')
+            if newlines >= line_end:
+                break
+
+    def line_offset(n: int) -> int:
+        pos = 0
+        for _ in range(n):
+            pos = buf.find(b'\n', pos) + 1
+            if pos == 0:
+                return len(buf)
+        return pos
+
+    begin = line_offset(start)
+    end = max(line_offset(line_end), begin)
+    return buf[begin:end].decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+
+def _resolve_workspace_path(workspace: str, file_path: str) -> str:
+    """워크스페이스 기준 경로를 실제 경로로 해석 (워크스페이스 밖이면 PermissionError)
+
+    심볼릭 링크는 도중에 생기거나 바뀔 수 있으므로 캐시하지 않고 매번 realpath 로 확인
+    """
+    root = os.path.realpath(workspace)
+    full_path = os.path.realpath(os.path.join(root, file_path))
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    if full_path != root and not full_path.startswith(prefix):
+        raise PermissionError(f"워크스페이스 밖의 경로는 사용할 수 없음: {file_path}")
+    return full_path
+
+
+# 도구 실행 중 OSError → 고정 메시지 (strerror 포맷 없이 errno 와 함께 반환, 하위 클래스 우선)
+TOOL_OS_ERRORS = (
+    (FileNotFoundError, "파일 또는 경로를 찾을 수 없음"),
+    (IsADirectoryError, "파일이 아니라 디렉토리임"),
+    (NotADirectoryError, "디렉토리가 아님"),
+    (PermissionError, "권한 없음"),
+)
+
+
+def _os_error_result(e: OSError) -> dict:
+    """OSError → 도구 실패 결과 (errno 가 없으면 직접 만든 메시지이므로 그대로 사용)"""
+    if e.errno is None:
+        return {"success": False, "error": str(e)}
+    for exc_type, message in TOOL_OS_ERRORS:
+        if isinstance(e, exc_type):
+            break
+    else:
+        message = "입출력 오류"
+    result = {"success": False, "error": message, "errno": e.errno}
+    if e.filename:
+        result["path"] = e.filename
+    return result
+
+
+# bash 도구: 차단할 위험 명령어와 실행 제한 시간(초)
+DANGEROUS_COMMANDS = ("rm -rf", "rm -r /", "sudo rm", "> /dev", "mkfs", "dd if=")
+BASH_TIMEOUT = 30
+
+
 class ToolExecutor:
     """도구 실행기 (maeum_code.py 스타일)"""
 
-    def __init__(self, workspace: str, tx_manager: TransactionManager, symbol_index: dict = None, search_engine: SearchEngine = None):
+    def __init__(self, workspace: str, tx_manager: TransactionManager, symbol_index: Dict[str, FileSymbols] = None, search_engine: SearchEngine = None):
         self.workspace = workspace
         self.tx_manager = tx_manager
         self.symbol_index = symbol_index if symbol_index is not None else {}
+        # read_file 은 워커 스레드에서 symbol_index 를 갱신하고, 프롬프트 생성은 루프 스레드에서 순회
+        self.symbol_index_lock = threading.Lock()
         self.search_engine = search_engine or SearchEngine(workspace)
+        self._memory_section_patterns = {
+            section: _compile_section_pattern(header)
+            for section, header in MEMORY_SECTION_HEADERS.items()
+        }
+        # 도구 호출 1회 동안만 유효한 stat 캐시 {path: stat_result | None}
+        # execute_async 는 도구를 워커 스레드에서 돌리므로 스레드별로 따로 보관
+        self._local = threading.local()
+        self._search_pool: Optional[ProcessPoolExecutor] = None
+        self._search_pool_lock = threading.Lock()
+
+        # web_search / web_fetch 용 keep-alive 세션 (TCP/TLS 연결 재사용)
+        self._http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+
+        # 비동기 경로가 있는 도구 (execute_async 에서 우선 사용)
+        self._async_tool_handlers = {
+            "bash": self._tool_bash_async,
+        }
+
+        # 도구 이름 → 핸들러 (elif 체인 대신 dict 조회 한 번)
+        self._tool_handlers = {
+            "bash": self._tool_bash,
+            "read_file": self._tool_read_file,
+            "write_file": self._tool_write_file,
+            "edit_file": self._tool_edit_file,
+            "list_dir": self._tool_list_dir,
+            "search_code": self._tool_search_code,
+            "todo_write": self._tool_todo_write,
+            "read_project_memory": self._tool_read_project_memory,
+            "update_project_memory": self._tool_update_project_memory,
+            "plan_task": self._tool_plan_task,
+            "grep": self._tool_grep,
+            "glob": self._tool_glob,
+            "find_symbol": self._tool_find_symbol,
+            "find_references": self._tool_find_references,
+            "find_definition": self._tool_find_definition,
+            "web_search": self._tool_web_search,
+            "web_fetch": self._tool_web_fetch,
+            "multi_edit": self._tool_multi_edit,
+            "git_status": self._tool_git_status,
+            "git_diff": self._tool_git_diff,
+            "git_log": self._tool_git_log,
+            "git_commit": self._tool_git_commit,
+            "project_structure": self._tool_project_structure,
+            "find_files_by_content": self._tool_find_files_by_content,
+            "analyze_code": self._tool_analyze_code,
+            "ask_user": self._tool_ask_user,
+            "explain_code": self._tool_explain_code,
+        }
+
+    def _get_search_pool(self) -> ProcessPoolExecutor:
+        """search_code 용 프로세스 풀 (첫 사용 시 생성, 이후 재사용)
+
+        여러 워커 스레드가 동시에 처음 호출해도 풀은 하나만 만든다.
+        """
+        with self._search_pool_lock:
+            if self._search_pool is None:
+                # 멀티스레드 서버에서 fork 하면 다른 스레드가 잡고 있던 lock 이 자식에 복사되어
+                # 교착될 수 있으므로 fork 대신 forkserver (없으면 spawn) 로 워커 생성
+                self._search_pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context(SEARCH_POOL_START_METHOD)
+                )
+            return self._search_pool
+
+    def close(self):
+        """프로세스 풀 종료 (서버 종료 시) - 대기 중인 작업은 취소"""
+        with self._search_pool_lock:
+            pool, self._search_pool = self._search_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def _stat_cache(self) -> Dict[str, Optional[os.stat_result]]:
+        """현재 스레드(도구 호출)의 stat 캐시"""
+        try:
+            return self._local.stat_cache
+        except AttributeError:
+            cache = self._local.stat_cache = {}
+            return cache
 
-    def _extract_file_symbols(self, file_path: str, content: str) -> dict:
-        """파일에서 심볼(함수, 클래스, 변수 등) 추출 - AST 파싱"""
-        import ast
-        import re
+    def _resolve(self, file_path: str) -> str:
+        """도구 입력 경로 → 워크스페이스 안의 절대 경로"""
+        return _resolve_workspace_path(self.workspace, file_path)
+
+    def _stat(self, path: str) -> Optional[os.stat_result]:
+        """캐시된 os.stat (없는 경로는 None)"""
+        try:
+            return self._stat_cache[path]
+        except KeyError:
+            pass
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        self._stat_cache[path] = st
+        return st
+
+    def _exists(self, path: str) -> bool:
+        return self._stat(path) is not None
+
+    def _isfile(self, path: str) -> bool:
+        st = self._stat(path)
+        return st is not None and S_ISREG(st.st_mode)
+
+    def _isdir(self, path: str) -> bool:
+        st = self._stat(path)
+        return st is not None and S_ISDIR(st.st_mode)
+
+    def _invalidate_stat(self, path: str):
+        """쓰기 후 해당 경로의 캐시 제거"""
+        self._stat_cache.pop(path, None)
 
+    def _extract_file_symbols(self, file_path: str, content: str) -> FileSymbols:
+        """파일에서 심볼(함수, 클래스, 변수 등) 추출 - AST 파싱"""
         ext = os.path.splitext(file_path)[1].lower()
-        symbols = {
-            "file": file_path,
-            "lines": content.count('\n') + 1,
-            "imports": [],
-            "classes": [],
-            "functions": [],
-            "variables": []
-        }
+        symbols = FileSymbols(file=file_path, lines=content.count('\n') + 1)
+        if len(content) > SYMBOL_PARSE_MAX_CHARS or symbols.lines > SYMBOL_PARSE_MAX_LINES:
+            symbols.error = "too_large"
+            return symbols
+        imports, classes, functions = symbols.imports, symbols.classes, symbols.functions
 
         try:
             # Python
             if ext == '.py':
                 tree = ast.parse(content)
-                for node in ast.walk(tree):
+                for node in _iter_statements(tree):
                     if isinstance(node, ast.Import):
                         for alias in node.names:
-                            symbols["imports"].append({"name": alias.name, "line": node.lineno})
+                            imports.append(SymbolInfo(alias.name, node.lineno))
                     elif isinstance(node, ast.ImportFrom):
                         module = node.module or ""
                         for alias in node.names:
-                            symbols["imports"].append({"name": f"{module}.{alias.name}", "line": node.lineno})
+                            imports.append(SymbolInfo(f"{module}.{alias.name}", node.lineno))
                     elif isinstance(node, ast.ClassDef):
-                        methods = [{"name": m.name, "line": m.lineno}
+                        methods = [SymbolInfo(m.name, m.lineno)
                                    for m in node.body if isinstance(m, (ast.FunctionDef, ast.AsyncFunctionDef))]
-                        symbols["classes"].append({
-                            "name": node.name, "line": node.lineno, "methods": methods
-                        })
+                        classes.append(SymbolInfo(node.name, node.lineno, methods=methods))
                     elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        symbols["functions"].append({
-                            "name": node.name, "line": node.lineno,
-                            "args": [arg.arg for arg in node.args.args]
-                        })
+                        functions.append(SymbolInfo(
+                            node.name, node.lineno, args=[arg.arg for arg in node.args.args]
+                        ))
 
             # JavaScript / TypeScript
             elif ext in ['.js', '.ts', '.jsx', '.tsx']:
                 for i, line in enumerate(content.split('\n'), 1):
                     if re.match(r'import\s+', line):
-                        symbols["imports"].append({"name": line.strip()[:50], "line": i})
+                        imports.append(SymbolInfo(line.strip()[:50], i))
                     if match := re.match(r'(?:export\s+)?class\s+(\w+)', line):
-                        symbols["classes"].append({"name": match.group(1), "line": i})
+                        classes.append(SymbolInfo(match.group(1), i))
                     if match := re.match(r'(?:export\s+)?(?:async\s+)?function\s+(\w+)', line):
-                        symbols["functions"].append({"name": match.group(1), "line": i})
+                        functions.append(SymbolInfo(match.group(1), i))
                     if match := re.match(r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\(', line):
-                        symbols["functions"].append({"name": match.group(1), "line": i})
+                        functions.append(SymbolInfo(match.group(1), i))
 
             # 기타
             else:
                 for i, line in enumerate(content.split('\n'), 1):
                     if match := re.match(r'\s*(?:def|func|function|fn)\s+(\w+)', line):
-                        symbols["functions"].append({"name": match.group(1), "line": i})
+                        functions.append(SymbolInfo(match.group(1), i))
                     if match := re.match(r'\s*(?:class|struct|interface)\s+(\w+)', line):
-                        symbols["classes"].append({"name": match.group(1), "line": i})
+                        classes.append(SymbolInfo(match.group(1), i))
 
         except Exception as e:
-            symbols["error"] = str(e)
+            symbols.error = str(e)
 
         return symbols
 
-    def execute(self, tool_name: str, tool_input: dict) -> dict:
-        """도구 실행 및 결과 반환"""
-        import subprocess
-
-        try:
-            if tool_name == "bash":
-                cmd = tool_input.get("command", "")
-                # 안전한 명령어만 허용 (rm -rf 등 위험 명령어 차단)
-                dangerous = ["rm -rf", "rm -r /", "sudo rm", "> /dev", "mkfs", "dd if="]
-                if any(d in cmd for d in dangerous):
-                    return {"success": False, "error": f"위험한 명령어 차단됨: {cmd}"}
-
-                result = subprocess.run(
-                    cmd,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    cwd=self.workspace
-                )
-                output = result.stdout + result.stderr
-                return {
-                    "success": result.returncode == 0,
-                    "output": output[:5000] if output else f"(exit code: {result.returncode})",
-                    "exit_code": result.returncode
-                }
-
-            elif tool_name == "read_file":
-                file_path = tool_input.get("file_path", "")
-                # start_line 또는 offset 지원 (호환성)
-                start_line = tool_input.get("start_line") or tool_input.get("offset", 1)
-                end_line = tool_input.get("end_line")  # 명시적 종료 라인
-                max_chars = 30000  # 3만자 제한
-                full_path = os.path.join(self.workspace, file_path)
-
-                if not os.path.exists(full_path):
-                    return {"success": False, "error": f"File not found: {file_path}"}
-
-                if not os.path.isfile(full_path):
-                    return {"success": False, "error": f"Not a file: {file_path}"}
-
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        full_content = f.read()
-
-                    total_chars = len(full_content)
-                    all_lines = full_content.split('\n')
-                    total_lines = len(all_lines)
-
-                    # 시작/종료 인덱스 계산 (1-based to 0-based)
-                    start_idx = max(0, start_line - 1)
-
-                    # end_line이 지정되면 해당 범위만 읽기
-                    if end_line is not None:
-                        end_idx = min(end_line, total_lines)
-                        # 지정된 범위 읽기 (max_chars 무시)
-                        numbered_lines = []
-                        for i in range(start_idx, end_idx):
-                            line_num = i + 1
-                            line_content = all_lines[i].rstrip('\r')
-                            numbered_lines.append(f"{line_num}: {line_content}")
-
-                        content = '\n'.join(numbered_lines)
-                        has_more = end_idx < total_lines
-
-                    else:
-                        # end_line 없으면 max_chars까지 읽기
-                        numbered_lines = []
-                        char_count = 0
-                        end_idx = start_idx
-
-                        for i in range(start_idx, total_lines):
-                            line_num = i + 1
-                            line_content = all_lines[i].rstrip('\r')
-                            line_with_num = f"{line_num}: {line_content}\n"
-
-                            if char_count + len(line_with_num) > max_chars and numbered_lines:
-                                break
-
-                            numbered_lines.append(f"{line_num}: {line_content}")
-                            char_count += len(line_with_num)
-                            end_idx = i + 1
-
-                        content = '\n'.join(numbered_lines)
-                        has_more = end_idx < total_lines
-
-                    remaining_lines = total_lines - end_idx
-
-                    # 심볼 추출 및 인덱싱 (처음 읽을 때만)
-                    symbols = None
-                    if file_path not in self.symbol_index:
-                        symbols = self._extract_file_symbols(file_path, full_content)
-                        self.symbol_index[file_path] = symbols
-
-                    result = {
-                        "success": True,
-                        "content": content,
-                        "file_path": file_path,
-                        "total_lines": total_lines,
-                        "total_chars": total_chars,
-                        "showing": f"{start_idx + 1}-{end_idx}",
-                        "chars_read": len(content),
-                        "has_more": has_more,
-                        "symbols": symbols
-                    }
-
-                    # 더 읽어야 할 내용이 있으면 안내
-                    if has_more:
-                        result["next_offset"] = end_idx + 1
-                        result["remaining_lines"] = remaining_lines
-                        result["CONTINUE"] = f"File has {remaining_lines} more lines. Use start_line={end_idx + 1} to continue."
+    def _read_and_patch(self, edit: dict) -> tuple:
+        """multi_edit 단일 항목 처리: 파일 읽기 + 치환 (쓰기는 하지 않음)
 
-                    return result
-
-                except UnicodeDecodeError:
-                    return {"success": False, "error": "Binary file, cannot read as text"}
+        Returns:
+            (file_path, new_content, error) - 실패 시 new_content는 None
+        """
+        file_path = edit.get("file_path", "")
+        old_text = edit.get("old_text", "")
+        new_text = edit.get("new_text", "")
 
-            elif tool_name == "write_file":
-                file_path = tool_input.get("file_path", "")
-                content = tool_input.get("content", "")
-                full_path = os.path.join(self.workspace, file_path)
+        # 일반 파일만 열기 (FIFO/장치 파일은 open/read 가 멈출 수 있음)
+        try:
+            full_path = self._resolve(file_path)
+            if not self._isfile(full_path):
+                return file_path, None, "파일 없음" if not self._exists(full_path) else "파일이 아님"
+            with open(full_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return file_path, None, "파일 없음"
+        except Exception as e:
+            return file_path, None, str(e)
 
-                # 부모 디렉토리 생성
-                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if old_text not in content:
+            return file_path, None, "텍스트를 찾을 수 없음"
 
-                # 트랜잭션으로 파일 생성/수정
-                exists = os.path.exists(full_path)
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+        return file_path, content.replace(old_text, new_text, 1), None
 
-                return {
-                    "success": True,
-                    "action": "overwritten" if exists else "created",
-                    "path": file_path,
-                    "size": len(content)
-                }
+    def execute(self, tool_name: str, tool_input: dict) -> dict:
+        """도구 실행 및 결과 반환"""
+        # stat 캐시는 도구 호출 단위로만 유지 (외부 변경에 대한 stale 방지)
+        # 스레드별 새 dict - 동시에 실행 중인 다른 도구 호출의 캐시는 건드리지 않음
+        self._local.stat_cache = {}
 
-            elif tool_name == "edit_file":
-                file_path = tool_input.get("file_path", "")
-                old_text = tool_input.get("old_text", "")
-                new_text = tool_input.get("new_text", "")
-                start_line = tool_input.get("start_line")
-                end_line = tool_input.get("end_line")
-                new_content_input = tool_input.get("new_content", "")
-                full_path = os.path.join(self.workspace, file_path)
+        try:
+            handler = self._tool_handlers.get(tool_name)
+            if handler is None:
+                return {"success": False, "error": f"알 수 없는 도구: {tool_name}"}
+            return handler(tool_input)
 
-                if not os.path.exists(full_path):
-                    return {"success": False, "error": f"File not found: {file_path}"}
+        except subprocess.TimeoutExpired:
+            return {"success": False, "error": "명령어 시간 초과 (30초)"}
+        except OSError as e:
+            return _os_error_result(e)
+        except UnicodeDecodeError:
+            return {"success": False, "error": "텍스트로 읽을 수 없는 파일 (바이너리)"}
+        except SyntaxError as e:
+            return {"success": False, "error": f"구문 오류: {e.msg} (line {e.lineno})"}
+        except Exception as e:
+            return {"success": False, "error": str(e), "error_type": type(e).__name__}
 
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+    async def execute_async(self, tool_name: str, tool_input: dict) -> dict:
+        """도구 실행 (비동기) - 이벤트 루프를 막지 않음
 
-                # 라인 범위 편집 모드
-                if start_line is not None and end_line is not None:
-                    all_lines = content.split('\n')
-                    total_lines = len(all_lines)
+        외부 명령 도구는 asyncio 서브프로세스로, 나머지(파일 I/O, 검색 등)는 워커 스레드에서 실행.
+        트랜잭션 도구(LOOP_THREAD_TOOLS)만 루프 스레드에서 바로 실행
+        """
+        handler = self._async_tool_handlers.get(tool_name)
+        if handler is None:
+            if tool_name in LOOP_THREAD_TOOLS:
+                # 공유 tx_manager 는 진행 중 트랜잭션이 하나뿐 - begin..commit 을 루프 스레드에서
+                # 끊김 없이 실행해 /api/file, /api/edit 의 트랜잭션과 겹치지 않게 함
+                return self.execute(tool_name, tool_input)
+            return await asyncio.to_thread(self.execute, tool_name, tool_input)
 
-                    if start_line < 1 or end_line > total_lines or start_line > end_line:
-                        return {"success": False, "error": f"Invalid line range: {start_line}-{end_line} (file has {total_lines} lines)"}
+        try:
+            return await handler(tool_input)
+        except asyncio.TimeoutError:
+            return {"success": False, "error": "명령어 시간 초과 (30초)"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
 
-                    # 라인 범위 교체 (1-based to 0-based)
-                    start_idx = start_line - 1
-                    end_idx = end_line
+    async def _tool_bash_async(self, tool_input: dict) -> dict:
+        cmd = tool_input.get("command", "")
+        if any(d in cmd for d in DANGEROUS_COMMANDS):
+            return {"success": False, "error": f"위험한 명령어 차단됨: {cmd}"}
 
-                    # 새 내용을 라인으로 분할
-                    new_lines = new_content_input.split('\n') if new_content_input else []
+        try:
+            proc = await asyncio.create_subprocess_shell(
+                cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.workspace
+            )
+        except NotImplementedError:
+            # 서브프로세스를 지원하지 않는 루프 (Windows SelectorEventLoop) → 동기 실행을 워커 스레드로
+            return await asyncio.to_thread(self.execute, "bash", tool_input)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=BASH_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+        # text=True 인 동기 경로와 같은 로케일 인코딩으로 디코딩
+        output = (stdout + stderr).decode(locale.getpreferredencoding(False), errors='replace')
+        return {
+            "success": proc.returncode == 0,
+            "output": output[:5000] if output else f"(exit code: {proc.returncode})",
+            "exit_code": proc.returncode
+        }
+
+    def _tool_bash(self, tool_input: dict) -> dict:
+        cmd = tool_input.get("command", "")
+        # 안전한 명령어만 허용 (rm -rf 등 위험 명령어 차단)
+        if any(d in cmd for d in DANGEROUS_COMMANDS):
+            return {"success": False, "error": f"위험한 명령어 차단됨: {cmd}"}
+
+        result = subprocess.run(
+            cmd,
+            shell=True,
+            capture_output=True,
+            text=True,
+            errors='replace',
+            timeout=BASH_TIMEOUT,
+            cwd=self.workspace
+        )
+        output = result.stdout + result.stderr
+        return {
+            "success": result.returncode == 0,
+            "output": output[:5000] if output else f"(exit code: {result.returncode})",
+            "exit_code": result.returncode
+        }
+
+    def _tool_read_file(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        # start_line 또는 offset 지원 (호환성)
+        start_line = tool_input.get("start_line") or tool_input.get("offset", 1)
+        end_line = tool_input.get("end_line")  # 명시적 종료 라인
+        max_chars = 30000  # 3만자 제한
+        full_path = self._resolve(file_path)
+
+        # 일반 파일만 열기 (FIFO/장치 파일은 open/read 가 멈출 수 있음) - stat 한 번으로 존재/종류 구분
+        st = self._stat(full_path)
+        if st is None:
+            return {"success": False, "error": f"File not found: {file_path}"}
+        if not S_ISREG(st.st_mode):
+            return {"success": False, "error": f"Not a file: {file_path}"}
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                full_content = f.read()
+        except FileNotFoundError:
+            return {"success": False, "error": f"File not found: {file_path}"}
+        except UnicodeDecodeError:
+            return {"success": False, "error": "Binary file, cannot read as text"}
+
+        total_chars = len(full_content)
+        all_lines = full_content.split('\n')
+        total_lines = len(all_lines)
+
+        # 시작/종료 인덱스 계산 (1-based to 0-based)
+        start_idx = max(0, start_line - 1)
+
+        # end_line이 지정되면 해당 범위만 읽기
+        if end_line is not None:
+            end_idx = min(end_line, total_lines)
+            # 지정된 범위 읽기 (max_chars 무시)
+            numbered_lines = []
+            for i in range(start_idx, end_idx):
+                line_num = i + 1
+                line_content = all_lines[i].rstrip('\r')
+                numbered_lines.append(f"{line_num}: {line_content}")
+
+            content = '\n'.join(numbered_lines)
+            has_more = end_idx < total_lines
 
-                    # 교체
-                    result_lines = all_lines[:start_idx] + new_lines + all_lines[end_idx:]
-                    new_content = '\n'.join(result_lines)
+        else:
+            # end_line 없으면 max_chars까지 읽기
+            numbered_lines = []
+            char_count = 0
+            end_idx = start_idx
+
+            for i in range(start_idx, total_lines):
+                line_num = i + 1
+                line_content = all_lines[i].rstrip('\r')
+                line_with_num = f"{line_num}: {line_content}\n"
+
+                if char_count + len(line_with_num) > max_chars and numbered_lines:
+                    break
+
+                numbered_lines.append(f"{line_num}: {line_content}")
+                char_count += len(line_with_num)
+                end_idx = i + 1
+
+            content = '\n'.join(numbered_lines)
+            has_more = end_idx < total_lines
+
+        remaining_lines = total_lines - end_idx
+
+        # 심볼 추출 및 인덱싱 (처음 읽을 때만)
+        symbols = None
+        if file_path not in self.symbol_index:
+            symbols = self._extract_file_symbols(file_path, full_content)
+            with self.symbol_index_lock:
+                self.symbol_index[file_path] = symbols
+
+        result = {
+            "success": True,
+            "content": content,
+            "file_path": file_path,
+            "total_lines": total_lines,
+            "total_chars": total_chars,
+            "showing": f"{start_idx + 1}-{end_idx}",
+            "chars_read": len(content),
+            "has_more": has_more,
+            "symbols": symbols.to_dict() if symbols else None
+        }
+
+        # 더 읽어야 할 내용이 있으면 안내
+        if has_more:
+            result["next_offset"] = end_idx + 1
+            result["remaining_lines"] = remaining_lines
+            result["CONTINUE"] = f"File has {remaining_lines} more lines. Use start_line={end_idx + 1} to continue."
+
+        return result
+
+    def _tool_write_file(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        content = tool_input.get("content", "")
+        full_path = self._resolve(file_path)
+
+        # 부모 디렉토리 생성
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # 트랜잭션으로 파일 생성/수정
+        exists = self._exists(full_path)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self._invalidate_stat(full_path)
+
+        return {
+            "success": True,
+            "action": "overwritten" if exists else "created",
+            "path": file_path,
+            "size": len(content)
+        }
+
+    def _tool_edit_file(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        old_text = tool_input.get("old_text", "")
+        new_text = tool_input.get("new_text", "")
+        start_line = tool_input.get("start_line")
+        end_line = tool_input.get("end_line")
+        new_content_input = tool_input.get("new_content", "")
+        full_path = self._resolve(file_path)
+
+        st = self._stat(full_path)
+        if st is None:
+            return {"success": False, "error": f"File not found: {file_path}"}
+        if not S_ISREG(st.st_mode):
+            return {"success": False, "error": f"Not a file: {file_path}"}
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return {"success": False, "error": f"File not found: {file_path}"}
 
-                    with open(full_path, 'w', encoding='utf-8') as f:
-                        f.write(new_content)
+        # 라인 범위 편집 모드
+        if start_line is not None and end_line is not None:
+            all_lines = content.split('\n')
+            total_lines = len(all_lines)
 
-                    lines_removed = end_line - start_line + 1
-                    lines_added = len(new_lines)
+            if start_line < 1 or end_line > total_lines or start_line > end_line:
+                return {"success": False, "error": f"Invalid line range: {start_line}-{end_line} (file has {total_lines} lines)"}
 
-                    return {
-                        "success": True,
-                        "path": file_path,
-                        "edit_type": "line_range",
-                        "range": f"{start_line}-{end_line}",
-                        "lines_removed": lines_removed,
-                        "lines_added": lines_added,
-                        "new_total_lines": len(result_lines)
-                    }
+            # 라인 범위 교체 (1-based to 0-based)
+            start_idx = start_line - 1
+            end_idx = end_line
 
-                # 텍스트 교체 모드
-                elif old_text:
-                    if old_text not in content:
-                        return {"success": False, "error": "Text not found in file"}
+            # 새 내용을 라인으로 분할
+            new_lines = new_content_input.split('\n') if new_content_input else []
 
-                    new_content = content.replace(old_text, new_text, 1)
+            # 교체
+            result_lines = all_lines[:start_idx] + new_lines + all_lines[end_idx:]
+            new_content = '\n'.join(result_lines)
 
-                    with open(full_path, 'w', encoding='utf-8') as f:
-                        f.write(new_content)
+            with open(full_path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            self._invalidate_stat(full_path)
 
-                    return {
-                        "success": True,
-                        "path": file_path,
-                        "edit_type": "text_replace",
-                        "changes": 1
-                    }
+            lines_removed = end_line - start_line + 1
+            lines_added = len(new_lines)
 
-                else:
-                    return {"success": False, "error": "Provide old_text/new_text OR start_line/end_line/new_content"}
+            return {
+                "success": True,
+                "path": file_path,
+                "edit_type": "line_range",
+                "range": f"{start_line}-{end_line}",
+                "lines_removed": lines_removed,
+                "lines_added": lines_added,
+                "new_total_lines": len(result_lines)
+            }
 
-            elif tool_name == "list_dir":
-                path = tool_input.get("path", "")
-                full_path = os.path.join(self.workspace, path)
+        # 텍스트 교체 모드
+        elif old_text:
+            if old_text not in content:
+                return {"success": False, "error": "Text not found in file"}
 
-                if not os.path.exists(full_path):
-                    return {"success": False, "error": f"경로 없음: {path}"}
+            new_content = content.replace(old_text, new_text, 1)
 
-                items = []
-                for name in sorted(os.listdir(full_path)):
-                    if name.startswith('.'):
-                        continue
-                    item_path = os.path.join(full_path, name)
-                    is_dir = os.path.isdir(item_path)
-                    items.append({
-                        "name": name,
-                        "type": "directory" if is_dir else "file",
-                        "size": os.path.getsize(item_path) if not is_dir else 0
-                    })
+            with open(full_path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            self._invalidate_stat(full_path)
 
-                return {"success": True, "path": path, "items": items[:50]}
+            return {
+                "success": True,
+                "path": file_path,
+                "edit_type": "text_replace",
+                "changes": 1
+            }
 
-            elif tool_name == "search_code":
-                query = tool_input.get("query", "")
-                file_pattern = tool_input.get("file_pattern", "*")
+        else:
+            return {"success": False, "error": "Provide old_text/new_text OR start_line/end_line/new_content"}
 
-                import re
-                import fnmatch
+    def _tool_list_dir(self, tool_input: dict) -> dict:
+        path = tool_input.get("path", "")
+        full_path = self._resolve(path)
 
-                results = []
-                for root, dirs, files in os.walk(self.workspace):
-                    # 숨김 폴더 제외
-                    dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
+        if not self._exists(full_path):
+            return {"success": False, "error": f"경로 없음: {path}"}
 
-                    for f in files:
-                        if not fnmatch.fnmatch(f, file_pattern):
-                            continue
-                        if f.startswith('.'):
-                            continue
+        items = []
+        for name in sorted(os.listdir(full_path)):
+            if name.startswith('.'):
+                continue
+            item_path = os.path.join(full_path, name)
+            st = self._stat(item_path)
+            is_dir = st is not None and S_ISDIR(st.st_mode)
+            items.append({
+                "name": name,
+                "type": "directory" if is_dir else "file",
+                "size": st.st_size if st is not None and not is_dir else 0
+            })
 
-                        file_path = os.path.join(root, f)
-                        rel_path = os.path.relpath(file_path, self.workspace)
+        return {"success": True, "path": path, "items": items[:50]}
 
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as fp:
-                                lines = fp.readlines()
-
-                            for i, line in enumerate(lines, 1):
-                                if re.search(query, line, re.IGNORECASE):
-                                    results.append({
-                                        "file": rel_path,
-                                        "line": i,
-                                        "content": line.strip()[:100]
-                                    })
+    def _tool_search_code(self, tool_input: dict) -> dict:
+        query = tool_input.get("query", "")
+        file_pattern = tool_input.get("file_pattern", "*")
 
-                                if len(results) >= 50:
-                                    break
-                        except:
-                            pass
+        # 파일 패턴은 호출당 한 번만 컴파일
+        match_name = compile_glob(file_pattern)
 
-                        if len(results) >= 50:
-                            break
+        try:
+            _cached_search_pattern(query)  # 잘못된 정규식은 스캔 전에 거름 (순차 경로는 이 컴파일 결과를 재사용)
+        except re.error as e:
+            return {"success": False, "error": f"잘못된 정규식: {e}"}
 
-                return {"success": True, "query": query, "matches": results}
+        candidates = list(_iter_search_files(self.workspace, match_name))
 
-            # ========== Claude Code 패턴: 새 도구들 ==========
+        results = []
+        if len(candidates) >= SEARCH_PARALLEL_MIN_FILES:
+            # 정규식 스캔은 CPU 바운드 → 프로세스 풀로 코어 분산
+            jobs = ((query, file_path, rel_path) for file_path, rel_path in candidates)
+            file_results = self._get_search_pool().map(_scan_file, jobs, chunksize=32)
+        else:
+            file_results = (_scan_file((query, file_path, rel_path)) for file_path, rel_path in candidates)
 
-            elif tool_name == "todo_write":
-                todos = tool_input.get("todos", [])
-                # 작업 목록을 .maeum_todos.json에 저장
-                todo_file = os.path.join(self.workspace, ".maeum_todos.json")
+        for matches in file_results:
+            results.extend(matches)
+            if len(results) >= 50:
+                del results[50:]
+                break
+        # 남은 작업 취소 (map 제너레이터를 닫으면 대기 중인 future 가 취소됨)
+        file_results.close()
 
-                # 기존 목록 로드
-                existing = []
-                if os.path.exists(todo_file):
-                    try:
-                        with open(todo_file, 'r', encoding='utf-8') as f:
-                            existing = json.load(f)
-                    except:
-                        pass
+        return {"success": True, "query": query, "matches": results}
 
-                # 새 목록으로 업데이트
-                with open(todo_file, 'w', encoding='utf-8') as f:
-                    json.dump(todos, f, ensure_ascii=False, indent=2)
+    # ========== Claude Code 패턴: 새 도구들 ==========
+    def _tool_todo_write(self, tool_input: dict) -> dict:
+        todos = tool_input.get("todos", [])
+        # 작업 목록을 .maeum_todos.json에 저장
+        todo_file = os.path.join(self.workspace, ".maeum_todos.json")
 
-                # 통계 계산
-                pending = sum(1 for t in todos if t.get("status") == "pending")
-                in_progress = sum(1 for t in todos if t.get("status") == "in_progress")
-                completed = sum(1 for t in todos if t.get("status") == "completed")
+        # 기존 목록 로드
+        existing = []
+        if self._exists(todo_file):
+            try:
+                with open(todo_file, 'rb') as f:
+                    existing = _load_json_bytes(f.read())
+            except (OSError, ValueError):
+                pass
 
-                return {
-                    "success": True,
-                    "message": f"작업 목록 업데이트됨",
-                    "stats": {
-                        "total": len(todos),
-                        "pending": pending,
-                        "in_progress": in_progress,
-                        "completed": completed
-                    },
-                    "todos": todos
-                }
+        # 새 목록으로 업데이트
+        _atomic_write_json(todo_file, todos)
+        self._invalidate_stat(todo_file)
+
+        # 통계 계산
+        pending = sum(1 for t in todos if t.get("status") == "pending")
+        in_progress = sum(1 for t in todos if t.get("status") == "in_progress")
+        completed = sum(1 for t in todos if t.get("status") == "completed")
+
+        return {
+            "success": True,
+            "message": f"작업 목록 업데이트됨",
+            "stats": {
+                "total": len(todos),
+                "pending": pending,
+                "in_progress": in_progress,
+                "completed": completed
+            },
+            "todos": todos
+        }
 
-            elif tool_name == "read_project_memory":
-                # MAEUM.md 파일 읽기
-                memory_file = os.path.join(self.workspace, "MAEUM.md")
+    def _tool_read_project_memory(self, tool_input: dict) -> dict:
+        # MAEUM.md 파일 읽기
+        memory_file = os.path.join(self.workspace, "MAEUM.md")
 
-                if not os.path.exists(memory_file):
-                    # 기본 템플릿 생성
-                    default_template = """# MAEUM 프로젝트 메모리
+        if not self._exists(memory_file):
+            # 기본 템플릿 생성
+            default_template = """# MAEUM 프로젝트 메모리
 
 ## Architecture (아키텍처)
 <!-- 프로젝트 구조, 핵심 컴포넌트 -->
@@ -1068,692 +2018,934 @@ class ToolExecutor:
 ---
 *이 파일은 MAEUM_CODE AI가 프로젝트를 이해하는 데 사용됩니다.*
 """
-                    with open(memory_file, 'w', encoding='utf-8') as f:
-                        f.write(default_template)
-                    return {
-                        "success": True,
-                        "content": default_template,
-                        "created": True,
-                        "message": "MAEUM.md 파일이 생성되었습니다."
-                    }
+            with _file_lock(memory_file):
+                _atomic_write_bytes(memory_file, default_template.encode('utf-8'))
+            self._invalidate_stat(memory_file)
+            return {
+                "success": True,
+                "content": default_template,
+                "created": True,
+                "message": "MAEUM.md 파일이 생성되었습니다."
+            }
 
-                with open(memory_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        with open(memory_file, 'r', encoding='utf-8') as f:
+            content = f.read()
 
-                return {
-                    "success": True,
-                    "content": content,
-                    "created": False
-                }
+        return {
+            "success": True,
+            "content": content,
+            "created": False
+        }
 
-            elif tool_name == "update_project_memory":
-                section = tool_input.get("section", "context")
-                new_content = tool_input.get("content", "")
+    def _tool_update_project_memory(self, tool_input: dict) -> dict:
+        section = tool_input.get("section", "context")
+        new_content = tool_input.get("content", "")
 
-                memory_file = os.path.join(self.workspace, "MAEUM.md")
+        memory_file = os.path.join(self.workspace, "MAEUM.md")
 
-                # 파일 읽기 (없으면 기본 템플릿)
-                if os.path.exists(memory_file):
-                    with open(memory_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                else:
-                    content = "# MAEUM 프로젝트 메모리\n\n"
-
-                # 섹션 매핑
-                section_headers = {
-                    "architecture": "## Architecture (아키텍처)",
-                    "patterns": "## Patterns (패턴)",
-                    "rules": "## Rules (규칙)",
-                    "context": "## Context (맥락)",
-                    "decisions": "## Decisions (결정)"
-                }
+        header = MEMORY_SECTION_HEADERS.get(section, f"## {section.title()}")
+        section_re = self._memory_section_patterns.get(section) or _compile_section_pattern(header)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        entry = f"\n- [{timestamp}] {new_content}"
 
-                header = section_headers.get(section, f"## {section.title()}")
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-                entry = f"\n- [{timestamp}] {new_content}"
-
-                # 섹션 찾아서 내용 추가
-                if header in content:
-                    # 해당 섹션 다음에 추가
-                    parts = content.split(header)
-                    if len(parts) >= 2:
-                        # 다음 ## 전까지가 섹션 내용
-                        section_content = parts[1]
-                        next_section_idx = section_content.find("\n##")
-                        if next_section_idx > 0:
-                            insert_pos = next_section_idx
-                        else:
-                            insert_pos = len(section_content)
+        # 읽기-수정-쓰기 전체를 lock 으로 보호 (동시 업데이트 유실 방지)
+        with _file_lock(memory_file):
+            # 파일 읽기 (없으면 기본 템플릿)
+            if self._exists(memory_file):
+                with open(memory_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            else:
+                content = "# MAEUM 프로젝트 메모리\n\n"
+
+            # 섹션 끝(다음 ## 직전)에 한 번의 치환으로 추가
+            content, replaced = section_re.subn(
+                lambda m: m.group(1).rstrip() + entry + "\n",
+                content,
+                count=1
+            )
+            if not replaced:
+                # 섹션이 없으면 새로 추가
+                content += f"\n{header}\n{entry}\n"
+
+            _atomic_write_bytes(memory_file, content.encode('utf-8'))
+        self._invalidate_stat(memory_file)
+
+        return {
+            "success": True,
+            "section": section,
+            "added": new_content,
+            "message": f"MAEUM.md의 {section} 섹션이 업데이트되었습니다."
+        }
+
+    def _tool_plan_task(self, tool_input: dict) -> dict:
+        task = tool_input.get("task", "")
+        files_to_examine = tool_input.get("files_to_examine", [])
+        considerations = tool_input.get("considerations", [])
+
+        # 계획서 생성
+        plan = {
+            "task": task,
+            "status": "planning",
+            "files_to_examine": files_to_examine,
+            "considerations": considerations,
+            "created_at": datetime.now().isoformat(),
+            "steps": []
+        }
+
+        # .maeum_plan.json에 저장
+        plan_file = os.path.join(self.workspace, ".maeum_plan.json")
+        _atomic_write_json(plan_file, plan)
+        self._invalidate_stat(plan_file)
+
+        return {
+            "success": True,
+            "plan": plan,
+            "message": f"작업 계획 생성됨: {task}",
+            "next_action": "검토할 파일들을 순서대로 read_file로 확인하세요."
+        }
+
+    # ========== 검색 도구 (grep, glob, find_symbol 등) ==========
+    def _tool_grep(self, tool_input: dict) -> dict:
+        pattern = tool_input.get("pattern", "")
+        path = tool_input.get("path", ".")
+        file_pattern = tool_input.get("file_pattern", None)
+        max_results = tool_input.get("max_results", 50)
+        context_lines = tool_input.get("context_lines", 2)
+
+        if not pattern:
+            return {"success": False, "error": "검색 패턴이 필요합니다"}
+
+        # 인덱스가 없으면 생성
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-                        new_section = section_content[:insert_pos].rstrip() + entry + "\n" + section_content[insert_pos:]
-                        content = parts[0] + header + new_section
-                else:
-                    # 섹션이 없으면 새로 추가
-                    content += f"\n{header}\n{entry}\n"
+        result = self.search_engine.search(
+            query=pattern,
+            mode=SearchMode.REGEX,
+            file_pattern=file_pattern,
+            max_results=max_results,
+            context_lines=context_lines
+        )
 
-                with open(memory_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
+        matches = []
+        for m in result.matches:
+            match_info = {
+                "file": m.file_path,
+                "line": m.line_number,
+                "column": m.column,
+                "content": m.line_content.strip()[:200],
+                "match": m.match_text
+            }
+            if m.context_before:
+                match_info["context_before"] = m.context_before
+            if m.context_after:
+                match_info["context_after"] = m.context_after
+            matches.append(match_info)
+
+        return {
+            "success": True,
+            "pattern": pattern,
+            "files_searched": result.files_searched,
+            "files_matched": result.files_matched,
+            "total_matches": result.total_matches,
+            "elapsed_time": f"{result.elapsed_time:.2f}s",
+            "matches": matches
+        }
+
+    def _tool_glob(self, tool_input: dict) -> dict:
+        pattern = tool_input.get("pattern", "*")
+        max_results = tool_input.get("max_results", 100)
+
+        # 인덱스가 없으면 생성
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-                return {
-                    "success": True,
-                    "section": section,
-                    "added": new_content,
-                    "message": f"MAEUM.md의 {section} 섹션이 업데이트되었습니다."
-                }
+        files = self.search_engine.find_files(pattern, max_results=max_results)
 
-            elif tool_name == "plan_task":
-                task = tool_input.get("task", "")
-                files_to_examine = tool_input.get("files_to_examine", [])
-                considerations = tool_input.get("considerations", [])
-
-                # 계획서 생성
-                plan = {
-                    "task": task,
-                    "status": "planning",
-                    "files_to_examine": files_to_examine,
-                    "considerations": considerations,
-                    "created_at": datetime.now().isoformat(),
-                    "steps": []
-                }
+        file_list = []
+        for f in files:
+            file_list.append({
+                "path": f.relative_path,
+                "name": f.name,
+                "type": f.file_type.value if hasattr(f.file_type, 'value') else str(f.file_type),
+                "size": f.size,
+                "priority": f.priority
+            })
 
-                # .maeum_plan.json에 저장
-                plan_file = os.path.join(self.workspace, ".maeum_plan.json")
-                with open(plan_file, 'w', encoding='utf-8') as f:
-                    json.dump(plan, f, ensure_ascii=False, indent=2)
+        return {
+            "success": True,
+            "pattern": pattern,
+            "count": len(file_list),
+            "files": file_list
+        }
 
-                return {
-                    "success": True,
-                    "plan": plan,
-                    "message": f"작업 계획 생성됨: {task}",
-                    "next_action": "검토할 파일들을 순서대로 read_file로 확인하세요."
-                }
+    def _tool_find_symbol(self, tool_input: dict) -> dict:
+        name = tool_input.get("name", "")
+        symbol_type = tool_input.get("symbol_type", None)  # function, class, variable
+        exact = tool_input.get("exact", False)
 
-            # ========== 검색 도구 (grep, glob, find_symbol 등) ==========
+        if not name:
+            return {"success": False, "error": "심볼 이름이 필요합니다"}
 
-            elif tool_name == "grep":
-                pattern = tool_input.get("pattern", "")
-                path = tool_input.get("path", ".")
-                file_pattern = tool_input.get("file_pattern", None)
-                max_results = tool_input.get("max_results", 50)
-                context_lines = tool_input.get("context_lines", 2)
+        # 인덱스가 없으면 생성
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-                if not pattern:
-                    return {"success": False, "error": "검색 패턴이 필요합니다"}
+        symbols = self.search_engine.find_symbol(name, symbol_type=symbol_type, exact=exact)
 
-                # 인덱스가 없으면 생성
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
+        return {
+            "success": True,
+            "name": name,
+            "count": len(symbols),
+            "symbols": symbols[:50]  # 최대 50개
+        }
 
-                result = self.search_engine.search(
-                    query=pattern,
-                    mode=SearchMode.REGEX,
-                    file_pattern=file_pattern,
-                    max_results=max_results,
-                    context_lines=context_lines
-                )
+    def _tool_find_references(self, tool_input: dict) -> dict:
+        symbol_name = tool_input.get("symbol_name", "")
+        definition_file = tool_input.get("definition_file", None)
 
-                matches = []
-                for m in result.matches:
-                    match_info = {
-                        "file": m.file_path,
-                        "line": m.line_number,
-                        "column": m.column,
-                        "content": m.line_content.strip()[:200],
-                        "match": m.match_text
-                    }
-                    if m.context_before:
-                        match_info["context_before"] = m.context_before
-                    if m.context_after:
-                        match_info["context_after"] = m.context_after
-                    matches.append(match_info)
+        if not symbol_name:
+            return {"success": False, "error": "심볼 이름이 필요합니다"}
 
-                return {
-                    "success": True,
-                    "pattern": pattern,
-                    "files_searched": result.files_searched,
-                    "files_matched": result.files_matched,
-                    "total_matches": result.total_matches,
-                    "elapsed_time": f"{result.elapsed_time:.2f}s",
-                    "matches": matches
-                }
+        # 인덱스가 없으면 생성
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-            elif tool_name == "glob":
-                pattern = tool_input.get("pattern", "*")
-                max_results = tool_input.get("max_results", 100)
+        matches = self.search_engine.find_references(symbol_name, definition_file=definition_file)
 
-                # 인덱스가 없으면 생성
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
+        references = []
+        for m in matches[:100]:  # 최대 100개
+            references.append({
+                "file": m.file_path,
+                "line": m.line_number,
+                "column": m.column,
+                "content": m.line_content.strip()[:200]
+            })
 
-                files = self.search_engine.find_files(pattern, max_results=max_results)
+        return {
+            "success": True,
+            "symbol_name": symbol_name,
+            "count": len(references),
+            "references": references
+        }
 
-                file_list = []
-                for f in files:
-                    file_list.append({
-                        "path": f.relative_path,
-                        "name": f.name,
-                        "type": f.file_type.value if hasattr(f.file_type, 'value') else str(f.file_type),
-                        "size": f.size,
-                        "priority": f.priority
-                    })
+    def _tool_find_definition(self, tool_input: dict) -> dict:
+        symbol_name = tool_input.get("symbol_name", "")
 
-                return {
-                    "success": True,
-                    "pattern": pattern,
-                    "count": len(file_list),
-                    "files": file_list
-                }
+        if not symbol_name:
+            return {"success": False, "error": "심볼 이름이 필요합니다"}
 
-            elif tool_name == "find_symbol":
-                name = tool_input.get("name", "")
-                symbol_type = tool_input.get("symbol_type", None)  # function, class, variable
-                exact = tool_input.get("exact", False)
+        # 인덱스가 없으면 생성
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-                if not name:
-                    return {"success": False, "error": "심볼 이름이 필요합니다"}
+        definition = self.search_engine.find_definition(symbol_name)
 
-                # 인덱스가 없으면 생성
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
+        if definition:
+            return {
+                "success": True,
+                "symbol_name": symbol_name,
+                "found": True,
+                "definition": definition
+            }
+        else:
+            return {
+                "success": True,
+                "symbol_name": symbol_name,
+                "found": False,
+                "message": f"'{symbol_name}'의 정의를 찾을 수 없습니다"
+            }
 
-                symbols = self.search_engine.find_symbol(name, symbol_type=symbol_type, exact=exact)
+    # ========== 웹 검색 도구 (7860 서버 연동) ==========
+    def _tool_web_search(self, tool_input: dict) -> dict:
+        query = tool_input.get("query", "")
+        max_results = tool_input.get("max_results", 5)
+        search_type = tool_input.get("search_type", "general")
 
-                return {
-                    "success": True,
-                    "name": name,
-                    "count": len(symbols),
-                    "symbols": symbols[:50]  # 최대 50개
-                }
-
-            elif tool_name == "find_references":
-                symbol_name = tool_input.get("symbol_name", "")
-                definition_file = tool_input.get("definition_file", None)
-
-                if not symbol_name:
-                    return {"success": False, "error": "심볼 이름이 필요합니다"}
+        if not query:
+            return {"success": False, "error": "검색 쿼리가 필요합니다"}
 
-                # 인덱스가 없으면 생성
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
-
-                matches = self.search_engine.find_references(symbol_name, definition_file=definition_file)
-
-                references = []
-                for m in matches[:100]:  # 최대 100개
-                    references.append({
-                        "file": m.file_path,
-                        "line": m.line_number,
-                        "column": m.column,
-                        "content": m.line_content.strip()[:200]
-                    })
+        try:
+            # 7860 서버의 웹 검색 API 호출
+            response = self._http.post(
+                "http://localhost:7860/api/chat",
+                json={
+                    "message": f"[웹 검색 요청] {query}",
+                    "system_prompt": "웹 검색 결과를 요약해서 제공해주세요.",
+                    "web_search": True,
+                    "max_results": max_results
+                },
+                timeout=30
+            )
 
+            if response.status_code == 200:
+                data = response.json()
                 return {
                     "success": True,
-                    "symbol_name": symbol_name,
-                    "count": len(references),
-                    "references": references
+                    "query": query,
+                    "search_type": search_type,
+                    "results": data.get("response", "검색 결과 없음"),
+                    "sources": data.get("sources", [])
                 }
+            else:
+                return {"success": False, "error": f"웹 검색 실패: HTTP {response.status_code}"}
 
-            elif tool_name == "find_definition":
-                symbol_name = tool_input.get("symbol_name", "")
-
-                if not symbol_name:
-                    return {"success": False, "error": "심볼 이름이 필요합니다"}
+        except requests.exceptions.ConnectionError:
+            return {"success": False, "error": "7860 서버에 연결할 수 없습니다. 서버가 실행 중인지 확인하세요."}
+        except Exception as e:
+            return {"success": False, "error": f"웹 검색 오류: {str(e)}"}
 
-                # 인덱스가 없으면 생성
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
+    def _tool_web_fetch(self, tool_input: dict) -> dict:
+        url = tool_input.get("url", "")
+        extract_code = tool_input.get("extract_code", False)
 
-                definition = self.search_engine.find_definition(symbol_name)
+        if not url:
+            return {"success": False, "error": "URL이 필요합니다"}
 
-                if definition:
-                    return {
-                        "success": True,
-                        "symbol_name": symbol_name,
-                        "found": True,
-                        "definition": definition
-                    }
+        max_chars = 10000
+        try:
+            # Jina Reader를 사용하거나 직접 fetch
+            jina_url = f"https://r.jina.ai/{url}"
+            with self._http.get(jina_url, timeout=30, headers={"Accept": "text/markdown"}, stream=True) as response:
+                if response.status_code != 200:
+                    return {"success": False, "error": f"페이지 가져오기 실패: HTTP {response.status_code}"}
+
+                encoding = response.encoding or "utf-8"
+                if extract_code:
+                    # 코드 블록은 문서 어디에나 있을 수 있으므로 전체 필요
+                    raw = response.content
+                    complete = True
                 else:
-                    return {
-                        "success": True,
-                        "symbol_name": symbol_name,
-                        "found": False,
-                        "message": f"'{symbol_name}'의 정의를 찾을 수 없습니다"
-                    }
-
-            # ========== 웹 검색 도구 (7860 서버 연동) ==========
+                    # UTF-8 최대 4바이트/문자 → max_chars 분량만 받고 중단
+                    raw, complete = _read_stream_limited(response, max_chars * 4 + 4)
 
-            elif tool_name == "web_search":
-                query = tool_input.get("query", "")
-                max_results = tool_input.get("max_results", 5)
-                search_type = tool_input.get("search_type", "general")
+            content = raw.decode(encoding, errors="replace")
 
-                if not query:
-                    return {"success": False, "error": "검색 쿼리가 필요합니다"}
-
-                import requests
-                try:
-                    # 7860 서버의 웹 검색 API 호출
-                    response = requests.post(
-                        "http://localhost:7860/api/chat",
-                        json={
-                            "message": f"[웹 검색 요청] {query}",
-                            "system_prompt": "웹 검색 결과를 요약해서 제공해주세요.",
-                            "web_search": True,
-                            "max_results": max_results
-                        },
-                        timeout=30
-                    )
+            if extract_code:
+                # 코드 블록만 추출
+                code_blocks = re.findall(r'```[\w]*\n(.*?)```', content, re.DOTALL)
+                content = "\n\n---\n\n".join(code_blocks) if code_blocks else "코드 블록을 찾을 수 없습니다."
 
-                    if response.status_code == 200:
-                        data = response.json()
-                        return {
-                            "success": True,
-                            "query": query,
-                            "search_type": search_type,
-                            "results": data.get("response", "검색 결과 없음"),
-                            "sources": data.get("sources", [])
-                        }
-                    else:
-                        return {"success": False, "error": f"웹 검색 실패: HTTP {response.status_code}"}
-
-                except requests.exceptions.ConnectionError:
-                    return {"success": False, "error": "7860 서버에 연결할 수 없습니다. 서버가 실행 중인지 확인하세요."}
-                except Exception as e:
-                    return {"success": False, "error": f"웹 검색 오류: {str(e)}"}
-
-            elif tool_name == "web_fetch":
-                url = tool_input.get("url", "")
-                extract_code = tool_input.get("extract_code", False)
-
-                if not url:
-                    return {"success": False, "error": "URL이 필요합니다"}
+            return {
+                "success": True,
+                "url": url,
+                "content": content[:max_chars],  # 최대 10000자
+                "truncated": len(content) > max_chars or not complete
+            }
 
-                import requests
-                try:
-                    # Jina Reader를 사용하거나 직접 fetch
-                    jina_url = f"https://r.jina.ai/{url}"
-                    response = requests.get(jina_url, timeout=30, headers={"Accept": "text/markdown"})
-
-                    if response.status_code == 200:
-                        content = response.text
-
-                        if extract_code:
-                            # 코드 블록만 추출
-                            import re
-                            code_blocks = re.findall(r'```[\w]*\n(.*?)```', content, re.DOTALL)
-                            content = "\n\n---\n\n".join(code_blocks) if code_blocks else "코드 블록을 찾을 수 없습니다."
-
-                        return {
-                            "success": True,
-                            "url": url,
-                            "content": content[:10000],  # 최대 10000자
-                            "truncated": len(content) > 10000
-                        }
-                    else:
-                        return {"success": False, "error": f"페이지 가져오기 실패: HTTP {response.status_code}"}
+        except Exception as e:
+            return {"success": False, "error": f"웹 페이지 가져오기 오류: {str(e)}"}
 
-                except Exception as e:
-                    return {"success": False, "error": f"웹 페이지 가져오기 오류: {str(e)}"}
+    # ========== 멀티 편집 도구 ==========
+    def _tool_multi_edit(self, tool_input: dict) -> dict:
+        edits = tool_input.get("edits", [])
+        description = tool_input.get("description", "Multi-edit")
 
-            # ========== 멀티 편집 도구 ==========
+        if not edits:
+            return {"success": False, "error": "편집 목록이 필요합니다"}
 
-            elif tool_name == "multi_edit":
-                edits = tool_input.get("edits", [])
-                description = tool_input.get("description", "Multi-edit")
+        # 파일 읽기 + 치환은 병렬로 (I/O 바운드)
+        with ThreadPoolExecutor(max_workers=min(16, len(edits))) as executor:
+            patched = list(executor.map(self._read_and_patch, edits))
 
-                if not edits:
-                    return {"success": False, "error": "편집 목록이 필요합니다"}
+        results = []
+        success_count = 0
+        fail_count = 0
 
-                results = []
-                success_count = 0
-                fail_count = 0
+        # 트랜잭션 기록은 순서 유지를 위해 직렬로
+        self.tx_manager.begin(description)
 
-                self.tx_manager.begin(description)
+        for file_path, new_content, error in patched:
+            if error:
+                results.append({"file": file_path, "success": False, "error": error})
+                fail_count += 1
+                continue
 
-                for edit in edits:
-                    file_path = edit.get("file_path", "")
-                    old_text = edit.get("old_text", "")
-                    new_text = edit.get("new_text", "")
+            try:
+                self.tx_manager.write(file_path, new_content)
+                results.append({"file": file_path, "success": True})
+                success_count += 1
+            except Exception as e:
+                results.append({"file": file_path, "success": False, "error": str(e)})
+                fail_count += 1
 
-                    full_path = os.path.join(self.workspace, file_path)
+        if fail_count == 0:
+            self.tx_manager.commit()
+            for file_path, _, _ in patched:
+                self._invalidate_stat(self._resolve(file_path))
+            return {
+                "success": True,
+                "description": description,
+                "total": len(edits),
+                "succeeded": success_count,
+                "failed": fail_count,
+                "results": results
+            }
+        else:
+            self.tx_manager.rollback()
+            return {
+                "success": False,
+                "error": f"{fail_count}개 파일 편집 실패",
+                "results": results
+            }
 
-                    if not os.path.exists(full_path):
-                        results.append({"file": file_path, "success": False, "error": "파일 없음"})
-                        fail_count += 1
-                        continue
+    # ========== Git 도구 ==========
+    def _tool_git_status(self, tool_input: dict) -> dict:
+        result = subprocess.run(
+            ["git", "status", "--porcelain=v2", "-z", "--branch"],
+            cwd=self.workspace,
+            capture_output=True,
+            timeout=10
+        )
 
-                    try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
+        if result.returncode == 0:
+            branch, changes = _parse_git_status_v2(result.stdout)
+            return {
+                "success": True,
+                "branch": branch,
+                "changes": changes,
+                "clean": len(changes) == 0
+            }
+        else:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            return {"success": False, "error": stderr or "Git 저장소가 아닙니다"}
+
+    def _tool_git_diff(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        staged = tool_input.get("staged", False)
+
+        cmd = ["git", "diff"]
+        if staged:
+            cmd.append("--cached")
+        if file_path:
+            cmd.append(file_path)
+
+        result = subprocess.run(
+            cmd,
+            cwd=self.workspace,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
 
-                        if old_text not in content:
-                            results.append({"file": file_path, "success": False, "error": "텍스트를 찾을 수 없음"})
-                            fail_count += 1
-                            continue
+        return {
+            "success": True,
+            "diff": result.stdout[:20000] if result.stdout else "(변경 없음)",
+            "truncated": len(result.stdout) > 20000 if result.stdout else False
+        }
 
-                        new_content = content.replace(old_text, new_text, 1)
-                        self.tx_manager.write(file_path, new_content)
-                        results.append({"file": file_path, "success": True})
-                        success_count += 1
+    def _tool_git_log(self, tool_input: dict) -> dict:
+        count = tool_input.get("count", 10)
+        file_path = tool_input.get("file_path", "")
 
-                    except Exception as e:
-                        results.append({"file": file_path, "success": False, "error": str(e)})
-                        fail_count += 1
+        cmd = ["git", "log", f"-{count}", "--oneline", "--decorate"]
+        if file_path:
+            cmd.extend(["--", file_path])
 
-                if fail_count == 0:
-                    self.tx_manager.commit()
-                    return {
-                        "success": True,
-                        "description": description,
-                        "total": len(edits),
-                        "succeeded": success_count,
-                        "failed": fail_count,
-                        "results": results
-                    }
-                else:
-                    self.tx_manager.rollback()
-                    return {
-                        "success": False,
-                        "error": f"{fail_count}개 파일 편집 실패",
-                        "results": results
-                    }
+        result = subprocess.run(
+            cmd,
+            cwd=self.workspace,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
 
-            # ========== Git 도구 ==========
+        if result.returncode == 0:
+            commits = []
+            for line in result.stdout.strip().split('\n'):
+                if line:
+                    parts = line.split(' ', 1)
+                    commits.append({
+                        "hash": parts[0],
+                        "message": parts[1] if len(parts) > 1 else ""
+                    })
 
-            elif tool_name == "git_status":
-                result = subprocess.run(
-                    ["git", "status", "--porcelain", "-b"],
-                    cwd=self.workspace,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+            return {"success": True, "commits": commits}
+        else:
+            return {"success": False, "error": result.stderr}
 
-                if result.returncode == 0:
-                    lines = result.stdout.strip().split('\n')
-                    branch = lines[0] if lines else "unknown"
-                    changes = []
-
-                    for line in lines[1:]:
-                        if line:
-                            status = line[:2]
-                            file_path = line[3:]
-                            status_map = {
-                                'M': 'modified', 'A': 'added', 'D': 'deleted',
-                                'R': 'renamed', 'C': 'copied', '?': 'untracked',
-                                'U': 'unmerged', ' M': 'modified (unstaged)',
-                                ' D': 'deleted (unstaged)'
-                            }
-                            changes.append({
-                                "file": file_path,
-                                "status": status_map.get(status.strip(), status)
-                            })
+    def _tool_git_commit(self, tool_input: dict) -> dict:
+        message = tool_input.get("message", "")
+        add_all = tool_input.get("add_all", False)
 
-                    return {
-                        "success": True,
-                        "branch": branch.replace("## ", ""),
-                        "changes": changes,
-                        "clean": len(changes) == 0
-                    }
-                else:
-                    return {"success": False, "error": result.stderr or "Git 저장소가 아닙니다"}
-
-            elif tool_name == "git_diff":
-                file_path = tool_input.get("file_path", "")
-                staged = tool_input.get("staged", False)
-
-                cmd = ["git", "diff"]
-                if staged:
-                    cmd.append("--cached")
-                if file_path:
-                    cmd.append(file_path)
-
-                result = subprocess.run(
-                    cmd,
-                    cwd=self.workspace,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+        if not message:
+            return {"success": False, "error": "커밋 메시지가 필요합니다"}
 
-                return {
-                    "success": True,
-                    "diff": result.stdout[:20000] if result.stdout else "(변경 없음)",
-                    "truncated": len(result.stdout) > 20000 if result.stdout else False
-                }
+        if add_all:
+            subprocess.run(["git", "add", "-A"], cwd=self.workspace, timeout=10)
 
-            elif tool_name == "git_log":
-                count = tool_input.get("count", 10)
-                file_path = tool_input.get("file_path", "")
+        result = subprocess.run(
+            ["git", "commit", "-m", message],
+            cwd=self.workspace,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
 
-                cmd = ["git", "log", f"-{count}", "--oneline", "--decorate"]
-                if file_path:
-                    cmd.extend(["--", file_path])
+        if result.returncode == 0:
+            return {"success": True, "message": message, "output": result.stdout}
+        else:
+            return {"success": False, "error": result.stderr or "커밋 실패"}
 
-                result = subprocess.run(
-                    cmd,
-                    cwd=self.workspace,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+    # ========== 프로젝트 구조 도구 ==========
+    def _tool_project_structure(self, tool_input: dict) -> dict:
+        max_depth = tool_input.get("max_depth", 4)
+        show_hidden = tool_input.get("show_hidden", False)
+        include_patterns = tool_input.get("include_patterns", [])
 
-                if result.returncode == 0:
-                    commits = []
-                    for line in result.stdout.strip().split('\n'):
-                        if line:
-                            parts = line.split(' ', 1)
-                            commits.append({
-                                "hash": parts[0],
-                                "message": parts[1] if len(parts) > 1 else ""
-                            })
+        match_include = compile_glob(*include_patterns) if include_patterns else None
 
-                    return {"success": True, "commits": commits}
-                else:
-                    return {"success": False, "error": result.stderr}
+        def build_tree(path, prefix="", depth=0):
+            if depth > max_depth:
+                return []
 
-            elif tool_name == "git_commit":
-                message = tool_input.get("message", "")
-                add_all = tool_input.get("add_all", False)
+            items = []
+            try:
+                entries = sorted(os.listdir(path))
+            except PermissionError:
+                return []
 
-                if not message:
-                    return {"success": False, "error": "커밋 메시지가 필요합니다"}
+            # 숨김 파일 필터링
+            if not show_hidden:
+                entries = [e for e in entries if not e.startswith('.')]
 
-                if add_all:
-                    subprocess.run(["git", "add", "-A"], cwd=self.workspace, timeout=10)
+            # 무시할 디렉토리
+            ignore_dirs = {'node_modules', '__pycache__', '.git', 'venv', '.venv', 'dist', 'build'}
+            entries = [e for e in entries if e not in ignore_dirs]
 
-                result = subprocess.run(
-                    ["git", "commit", "-m", message],
-                    cwd=self.workspace,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+            for i, entry in enumerate(entries):
+                full_path = os.path.join(path, entry)
+                is_last = i == len(entries) - 1
+                connector = "└── " if is_last else "├── "
+                extension = "    " if is_last else "│   "
 
-                if result.returncode == 0:
-                    return {"success": True, "message": message, "output": result.stdout}
+                if os.path.isdir(full_path):
+                    items.append(f"{prefix}{connector}📁 {entry}/")
+                    items.extend(build_tree(full_path, prefix + extension, depth + 1))
                 else:
-                    return {"success": False, "error": result.stderr or "커밋 실패"}
-
-            # ========== 프로젝트 구조 도구 ==========
-
-            elif tool_name == "project_structure":
-                max_depth = tool_input.get("max_depth", 4)
-                show_hidden = tool_input.get("show_hidden", False)
-                include_patterns = tool_input.get("include_patterns", [])
-
-                def build_tree(path, prefix="", depth=0):
-                    if depth > max_depth:
-                        return []
-
-                    items = []
-                    try:
-                        entries = sorted(os.listdir(path))
-                    except PermissionError:
-                        return []
-
-                    # 숨김 파일 필터링
-                    if not show_hidden:
-                        entries = [e for e in entries if not e.startswith('.')]
-
-                    # 무시할 디렉토리
-                    ignore_dirs = {'node_modules', '__pycache__', '.git', 'venv', '.venv', 'dist', 'build'}
-                    entries = [e for e in entries if e not in ignore_dirs]
-
-                    for i, entry in enumerate(entries):
-                        full_path = os.path.join(path, entry)
-                        is_last = i == len(entries) - 1
-                        connector = "└── " if is_last else "├── "
-                        extension = "    " if is_last else "│   "
-
-                        if os.path.isdir(full_path):
-                            items.append(f"{prefix}{connector}📁 {entry}/")
-                            items.extend(build_tree(full_path, prefix + extension, depth + 1))
-                        else:
-                            # 패턴 필터링
-                            if include_patterns:
-                                import fnmatch
-                                if not any(fnmatch.fnmatch(entry, p) for p in include_patterns):
-                                    continue
-                            items.append(f"{prefix}{connector}📄 {entry}")
-
-                    return items
-
-                tree = build_tree(self.workspace)
-
-                return {
-                    "success": True,
-                    "workspace": self.workspace,
-                    "structure": "\n".join(tree[:500]),  # 최대 500줄
-                    "truncated": len(tree) > 500
-                }
-
-            elif tool_name == "find_files_by_content":
-                content = tool_input.get("content", "")
-                file_pattern = tool_input.get("file_pattern", "*")
-
-                if not content:
-                    return {"success": False, "error": "검색할 내용이 필요합니다"}
+                    # 패턴 필터링
+                    if match_include and not match_include(entry):
+                        continue
+                    items.append(f"{prefix}{connector}📄 {entry}")
 
-                # 인덱스 사용
-                if not self.search_engine._file_index:
-                    self.search_engine.index_codebase()
+            return items
 
-                result = self.search_engine.search(
-                    query=content,
-                    mode=SearchMode.CONTENT,
-                    file_pattern=file_pattern,
-                    max_results=50
-                )
+        tree = build_tree(self.workspace)
 
-                files = list(set([m.file_path for m in result.matches]))
+        return {
+            "success": True,
+            "workspace": self.workspace,
+            "structure": "\n".join(tree[:500]),  # 최대 500줄
+            "truncated": len(tree) > 500
+        }
 
-                return {
-                    "success": True,
-                    "content": content,
-                    "file_count": len(files),
-                    "files": files
-                }
+    def _tool_find_files_by_content(self, tool_input: dict) -> dict:
+        content = tool_input.get("content", "")
+        file_pattern = tool_input.get("file_pattern", "*")
 
-            elif tool_name == "analyze_code":
-                file_path = tool_input.get("file_path", "")
-                analysis_type = tool_input.get("analysis_type", "all")
+        if not content:
+            return {"success": False, "error": "검색할 내용이 필요합니다"}
 
-                full_path = os.path.join(self.workspace, file_path)
-                if not os.path.exists(full_path):
-                    return {"success": False, "error": f"파일을 찾을 수 없음: {file_path}"}
+        # 인덱스 사용
+        if not self.search_engine._file_index:
+            self.search_engine.index_codebase()
 
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        # 파일당 첫 매치에서 멈추고, 50개 파일을 찾으면 검색 종료
+        result = self.search_engine.search(
+            query=content,
+            mode=SearchMode.EXACT,
+            file_pattern=file_pattern,
+            max_results=50,
+            context_lines=0,
+            files_only=True
+        )
 
-                analysis = {
-                    "file": file_path,
-                    "lines": len(content.split('\n')),
-                    "size": len(content),
-                }
+        files = list(dict.fromkeys(m.file_path for m in result.matches))
 
-                # Python 분석
-                if file_path.endswith('.py'):
-                    import ast
-                    try:
-                        tree = ast.parse(content)
-                        classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-                        functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-                        imports = []
-                        for node in ast.walk(tree):
-                            if isinstance(node, ast.Import):
-                                imports.extend([alias.name for alias in node.names])
-                            elif isinstance(node, ast.ImportFrom):
-                                imports.append(node.module or '')
-
-                        analysis["classes"] = classes
-                        analysis["functions"] = functions
-                        analysis["imports"] = list(set(imports))
-                        analysis["complexity"] = "high" if len(functions) > 20 else "medium" if len(functions) > 10 else "low"
-
-                    except SyntaxError as e:
-                        analysis["syntax_error"] = str(e)
-
-                return {"success": True, "analysis": analysis}
-
-            elif tool_name == "ask_user":
-                # 이 도구는 특별 처리 필요 - WebSocket으로 사용자에게 질문
-                question = tool_input.get("question", "")
-                options = tool_input.get("options", [])
+        return {
+            "success": True,
+            "content": content,
+            "file_count": len(files),
+            "files": files
+        }
 
-                return {
-                    "success": True,
-                    "type": "user_input_required",
-                    "question": question,
-                    "options": options,
-                    "message": "사용자 입력 대기 중..."
-                }
+    def _tool_analyze_code(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        analysis_type = tool_input.get("analysis_type", "all")
 
-            elif tool_name == "explain_code":
-                file_path = tool_input.get("file_path", "")
-                line_start = tool_input.get("line_start", 1)
-                line_end = tool_input.get("line_end", None)
-                symbol_name = tool_input.get("symbol_name", "")
+        full_path = self._resolve(file_path)
+        st = self._stat(full_path)
+        if st is None:
+            return {"success": False, "error": f"파일을 찾을 수 없음: {file_path}"}
 
-                full_path = os.path.join(self.workspace, file_path)
-                if not os.path.exists(full_path):
-                    return {"success": False, "error": f"파일을 찾을 수 없음: {file_path}"}
+        if S_ISDIR(st.st_mode):
+            return self._analyze_directory(file_path, full_path)
 
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
+        analysis = {"file": file_path}
+        analysis.update(_analyze_source(full_path, st.st_mtime_ns, st.st_size).to_dict())
 
-                if line_end:
-                    code = ''.join(lines[line_start-1:line_end])
-                elif symbol_name:
-                    # 심볼 찾기
-                    code = ''.join(lines)  # 전체 코드 반환, AI가 심볼 찾아서 설명
-                else:
-                    code = ''.join(lines)
+        return {"success": True, "analysis": analysis}
 
-                return {
-                    "success": True,
-                    "file": file_path,
-                    "code": code[:5000],
-                    "line_start": line_start,
-                    "line_end": line_end or len(lines),
-                    "symbol_name": symbol_name,
-                    "message": "코드를 분석하고 설명해주세요."
-                }
+    def _analyze_directory(self, dir_path: str, full_path: str) -> dict:
+        """analyze_code 디렉토리 모드: 하위 .py 파일을 일괄 분석 (파일이 많으면 프로세스 풀)"""
+        # 한도보다 하나 더 모아서 실제로 잘렸는지 판별 (정확히 한도만큼 있으면 잘린 것 아님)
+        targets = []
+        for abs_path, rel_path in _iter_search_files(full_path, lambda name: name.endswith('.py')):
+            targets.append((abs_path, os.path.join(dir_path, rel_path)))
+            if len(targets) > ANALYZE_BATCH_MAX_FILES:
+                break
+        truncated = len(targets) > ANALYZE_BATCH_MAX_FILES
+        del targets[ANALYZE_BATCH_MAX_FILES:]
 
-            else:
-                return {"success": False, "error": f"알 수 없는 도구: {tool_name}"}
+        paths = [abs_path for abs_path, _ in targets]
+        if len(paths) >= SEARCH_PARALLEL_MIN_FILES:
+            # 파싱은 CPU 바운드(GIL) → 스레드가 아닌 프로세스로 분산
+            analyses = self._get_search_pool().map(_analyze_file_job, paths, chunksize=8)
+        else:
+            analyses = map(_analyze_file_job, paths)
+
+        files = [{"file": rel_path, **analysis} for (_, rel_path), analysis in zip(targets, analyses)]
+        return {
+            "success": True,
+            "directory": dir_path,
+            "file_count": len(files),
+            "truncated": truncated,
+            "files": files
+        }
+
+    def _tool_ask_user(self, tool_input: dict) -> dict:
+        # 이 도구는 특별 처리 필요 - WebSocket으로 사용자에게 질문
+        question = tool_input.get("question", "")
+        options = tool_input.get("options", [])
+
+        return {
+            "success": True,
+            "type": "user_input_required",
+            "question": question,
+            "options": options,
+            "message": "사용자 입력 대기 중..."
+        }
+
+    def _tool_explain_code(self, tool_input: dict) -> dict:
+        file_path = tool_input.get("file_path", "")
+        line_start = tool_input.get("line_start", 1)
+        line_end = tool_input.get("line_end", None)
+        symbol_name = tool_input.get("symbol_name", "")
+
+        full_path = self._resolve(file_path)
+        st = self._stat(full_path)
+        if st is None:
+            return {"success": False, "error": f"파일을 찾을 수 없음: {file_path}"}
+
+        span = None
+        if symbol_name and not line_end and full_path.endswith('.py'):
+            # 심볼 찾기 - analyze_code 와 같은 캐시된 파싱 결과에서 위치 조회
+            span = _analyze_source(full_path, st.st_mtime_ns, st.st_size).spans.get(symbol_name)
+            if span:
+                line_start, line_end = span
+
+        if line_end:
+            code = _read_source_window(full_path, st.st_mtime_ns, st.st_size, line_start, line_end)
+            line_count = None
+        elif symbol_name:
+            # 심볼을 못 찾으면 전체 코드 반환, AI가 심볼 찾아서 설명
+            code, line_count = _read_source_head(full_path, st.st_mtime_ns, st.st_size)
+        else:
+            code, line_count = _read_source_head(full_path, st.st_mtime_ns, st.st_size)
 
-        except subprocess.TimeoutExpired:
-            return {"success": False, "error": "명령어 시간 초과 (30초)"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return {
+            "success": True,
+            "file": file_path,
+            "code": code[:EXPLAIN_MAX_CHARS],
+            "line_start": line_start,
+            "line_end": line_end or line_count,
+            "symbol_name": symbol_name,
+            "message": "코드를 분석하고 설명해주세요."
+        }
 
 
 # ============================================================
 # IDE Server
 # ============================================================
 
+# CORS - 사용하는 메서드/헤더만 명시 (와일드카드 대신)
+CORS_ALLOW_METHODS = ["GET", "POST", "DELETE", "OPTIONS"]
+CORS_ALLOW_HEADERS = ["Content-Type", "Authorization"]
+
+# API 기본 응답 직렬화 - orjson 설치 시 ORJSONResponse (bytes 직접 생성)
+DEFAULT_RESPONSE_CLASS = ORJSONResponse if orjson is not None else JSONResponse
+
+# 확장자 → 에디터 언어 (_detect_language)
+EXT_TO_LANG = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.jsx': 'javascript',
+    '.html': 'html',
+    '.css': 'css',
+    '.scss': 'scss',
+    '.json': 'json',
+    '.md': 'markdown',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.xml': 'xml',
+    '.sql': 'sql',
+    '.sh': 'shell',
+    '.bash': 'shell',
+    '.zsh': 'shell',
+    '.c': 'c',
+    '.cpp': 'cpp',
+    '.h': 'c',
+    '.hpp': 'cpp',
+    '.java': 'java',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.r': 'r',
+    '.lua': 'lua',
+    '.pl': 'perl',
+    '.dockerfile': 'dockerfile',
+    '.toml': 'toml',
+    '.ini': 'ini',
+    '.cfg': 'ini',
+    '.env': 'shell',
+}
+# 심볼 검색 대상 언어 (/api/analyze/file)
+CODE_LANGS = frozenset({'python', 'javascript', 'typescript', 'rust', 'go', 'java', 'cpp', 'c'})
+# 확장자 대신 파일명으로 판별하는 경우
+FILENAME_TO_LANG = {
+    'dockerfile': 'dockerfile',
+    'makefile': 'makefile',
+}
+FILENAME_PREFIX_RE = re.compile(r'(%s)\.' % '|'.join(map(re.escape, FILENAME_TO_LANG)))
+
+# 확장자만으로 애매한 경우 파일 앞부분을 보고 판별: 확장자 → ((패턴, 언어), ...) - 먼저 맞는 것 사용
+# ('' 는 확장자 없는 스크립트 - shebang 으로 판별)
+LANG_SNIFF_CHARS = 4096
+LANG_SNIFF_RULES = {
+    '.h': (
+        (re.compile(r'^\s*@(?:interface|implementation|protocol)\b', re.M), 'objective-c'),
+        (re.compile(r'^\s*(?:class|namespace|template)\b|\bstd::', re.M), 'cpp'),
+    ),
+    '.m': (
+        (re.compile(r'^\s*(?:@(?:interface|implementation|import)\b|#import\b)', re.M), 'objective-c'),
+    ),
+    '': (
+        (re.compile(r'\A#!.*\bpython'), 'python'),
+        (re.compile(r'\A#!.*\b(?:ba|z)?sh\b'), 'shell'),
+        (re.compile(r'\A#!.*\bnode\b'), 'javascript'),
+        (re.compile(r'\A#!.*\bperl\b'), 'perl'),
+        (re.compile(r'\A#!.*\bruby\b'), 'ruby'),
+    ),
+}
+
+# 시스템 프롬프트 디렉토리 트리에서 제외할 폴더 (숨김 항목은 별도로 제외)
+DIR_TREE_EXCLUDE = frozenset({'__pycache__', 'node_modules', 'venv', 'dist', 'build'})
+# 디렉토리 트리 최대 줄 수 - 도달하면 더 이상 하위 디렉토리를 읽지 않음
+DIR_TREE_MAX_LINES = 150
+# 디렉토리 트리 재사용 시간 (초) - 루트 mtime 이 바뀌거나 파일/도구 작업이 있으면 즉시 무효화
+DIR_TREE_TTL = 30
+
+# AI 컨텍스트용 파일 읽기 버퍼 크기 (_read_file_content)
+FILE_READ_BUFFER = 1 << 20
+
+# 도구 확인 요청에 표시할 설명 (_get_tool_description) - 없는 도구는 입력 JSON 그대로 표시
+TOOL_DESCRIBERS = {
+    "bash": lambda ti: f"명령어 실행: {ti.get('command', '')}",
+    "write_file": lambda ti: f"파일 작성: {ti.get('file_path', '')} ({len(ti.get('content', ''))}자)",
+    "edit_file": lambda ti: f"파일 수정: {ti.get('file_path', '')}",
+    "read_file": lambda ti: f"파일 읽기: {ti.get('file_path', '')}",
+    "list_dir": lambda ti: f"디렉토리 목록: {ti.get('path', '/')}",
+    "search_code": lambda ti: f"코드 검색: {ti.get('query', '')}",
+}
+
+# Agentic Loop 토큰 전송 묶음 기준 (글자 수 / 초) - 어느 쪽이든 먼저 넘으면 전송
+# (다음 토큰이 없어도 TOKEN_BATCH_INTERVAL 이 지나면 남은 텍스트를 전송)
+TOKEN_BATCH_CHARS = 64
+TOKEN_BATCH_INTERVAL = 0.016
+
+# Agentic Loop 프롬프트에 남겨둘 최근 도구 결과 개수 (각 결과는 3000자로 잘림)
+TOOL_RESULT_CONTEXT_TURNS = 3
+
+# 생성 중단 시 abort 를 보낼 KoboldCpp 엔드포인트: (로그 라벨, URL)
+ABORT_ENDPOINTS = (
+    ("Qwen 12345", "http://localhost:12345/api/extra/abort"),
+    ("7860", "http://localhost:7860/api/extra/abort"),  # 통합 서버
+)
+
+# 시스템 프롬프트에 넣을 최근 대화 개수 (각 200자로 잘림)
+RECENT_MESSAGES_IN_PROMPT = 4
+
+# 대화 이력 최대 보관 개수 (넘으면 오래된 것부터 제거, 보통은 그 전에 컨텍스트 압축)
+HISTORY_MAX_MESSAGES = 500
+
+# /api/analyze/workspace 결과 재사용 시간 (초) - 루트 mtime 이 바뀌면 즉시 무효화
+WORKSPACE_ANALYSIS_TTL = 60
+
+
+@lru_cache(maxsize=4096)
+def _detect_language_by_name(path: str) -> str:
+    """파일명/확장자로 언어 감지 (경로별 결과 캐시)"""
+    name = os.path.basename(path).lower()
+    lang = FILENAME_TO_LANG.get(name) or EXT_TO_LANG.get(os.path.splitext(name)[1])
+    if lang:
+        return lang
+    # Dockerfile.prod, Makefile.inc 등 - 모르는 확장자일 때만 파일명 앞부분으로 판별
+    m = FILENAME_PREFIX_RE.match(name)
+    return FILENAME_TO_LANG[m.group(1)] if m else 'plaintext'
+
+
+def _detect_language(path: str, content: Optional[str] = None) -> str:
+    """언어 감지 - 확장자 조회가 기본, 애매한 확장자만 content 앞부분을 확인
+
+    content 가 없으면 (파일을 읽지 않은 호출부) 확장자 결과를 그대로 사용
+    """
+    if content:
+        rules = LANG_SNIFF_RULES.get(os.path.splitext(os.path.basename(path))[1].lower())
+        if rules:
+            head = content[:LANG_SNIFF_CHARS]
+            for pattern, lang in rules:
+                if pattern.search(head):
+                    return lang
+    return _detect_language_by_name(path)
+
+
+# 이 크기를 넘는 파일은 /api/file 에서 스레드로 읽음 (작은 파일은 오프로드 비용이 더 큼)
+ASYNC_READ_THRESHOLD = 64 * 1024
+
+# 바이너리 판별용으로 먼저 읽는 크기 (git / file(1) 과 같은 NUL 바이트 검사)
+BINARY_SNIFF_SIZE = 512
+
+# latin-1 은 모든 바이트를 디코딩하므로 마지막 시도는 항상 성공
+TEXT_FALLBACK_ENCODINGS = ('utf-8', 'cp949', 'latin-1')
+
+
+def _read_text_file(full_path: str) -> Optional[str]:
+    """텍스트 파일 읽기 - 한 번만 읽고 utf-8 → cp949 → latin-1 순서로 디코딩 시도
+
+    앞 BINARY_SNIFF_SIZE 바이트에 NUL 이 있으면 바이너리로 보고 나머지는 읽지 않음 (None 반환)
+    """
+    with open(full_path, 'rb') as f:
+        head = f.read(BINARY_SNIFF_SIZE)
+        if b'\x00' in head:
+            return None
+        data = head + f.read()
+
+    for encoding in TEXT_FALLBACK_ENCODINGS:
+        try:
+            content = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+
+    # 텍스트 모드 읽기와 같은 줄바꿈 (universal newlines)
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def _join_tail(parts: List[str], max_chars: int) -> str:
+    """parts 를 이어 붙인 문자열의 마지막 max_chars 글자 (뒤쪽 조각만 join)"""
+    tail = []
+    size = 0
+    for part in reversed(parts):
+        tail.append(part)
+        size += len(part)
+        if size >= max_chars:
+            break
+    return "".join(reversed(tail))[-max_chars:]
+
+
+def _tally_extensions(root: str, top_dirs: Optional[list] = None) -> tuple:
+    """root 아래 파일 수와 확장자별 개수 (숨김/무시 폴더 제외)
+
+    os.walk 대신 scandir 스택 순회 - DirEntry 의 d_type 으로 파일/디렉토리를 구분하므로 항목별 stat 없음
+    top_dirs 가 주어지면 root 바로 아래 디렉토리는 내려가지 않고 top_dirs 에 모음 (병렬 분할용)
+
+    Returns:
+        (file_count, {ext: count})
+    """
+    file_count = 0
+    ext_counts: Dict[str, int] = {}
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        subdirs = top_dirs if top_dirs is not None and path is root else stack
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue  # os.walk 와 같이 읽을 수 없는 디렉토리는 건너뜀
+        with it:
+            for entry in it:
+                name = entry.name
+                if name.startswith('.'):
+                    continue
+                try:
+                    is_dir = entry.is_dir()  # 심볼릭 링크가 아니면 d_type 만으로 판별
+                except OSError:
+                    continue
+                if is_dir:
+                    # 디렉토리 링크는 따라가지 않음 (os.walk followlinks=False 와 동일)
+                    if name not in SEARCH_IGNORE_DIRS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                file_count += 1
+                # Path.suffix 와 같은 규칙 (이름 끝의 '.' 은 확장자 아님)
+                dot = name.rfind('.')
+                ext = name[dot:].lower() if 0 < dot < len(name) - 1 else ''
+                ext_counts[ext] = ext_counts.get(ext, 0) + 1
+    return file_count, ext_counts
+
+
+def _tally_workspace(root: str) -> tuple:
+    """워크스페이스 전체 집계 - 최상위 하위 디렉토리마다 스레드로 나눠 순회
+
+    순회 시간은 getdents/stat 대기가 대부분 (GIL 해제) 이므로 스레드로 겹쳐 실행
+
+    Returns:
+        (file_count, Counter{ext: count})
+    """
+    top_dirs: List[str] = []
+    file_count, root_counts = _tally_extensions(root, top_dirs)
+    ext_counts = Counter(root_counts)
+
+    if top_dirs:
+        workers = min(32, os.cpu_count() or 4, len(top_dirs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for count, counts in executor.map(_tally_extensions, top_dirs):
+                file_count += count
+                ext_counts.update(counts)
+    return file_count, ext_counts
+
+
+# _extract_symbols 용 정규식 (줄마다 re.match 캐시 조회하지 않도록 미리 컴파일)
+JS_IMPORT_RE = re.compile(r'import\s+.*?from\s+[\'"](.+?)[\'"]')
+JS_CLASS_RE = re.compile(r'(?:export\s+)?class\s+(\w+)')
+JS_FUNC_RES = (
+    re.compile(r'(?:export\s+)?(?:async\s+)?function\s+(\w+)'),
+    re.compile(r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\('),
+    re.compile(r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\w+\s*=>'),
+)
+JS_EXPORT_RE = re.compile(r'export\s+(?:default\s+)?(\w+)')
+OTHER_FUNC_RE = re.compile(r'\s*(?:def|func|function|fn)\s+(\w+)')
+OTHER_CLASS_RE = re.compile(r'\s*(?:class|struct|interface|type)\s+(\w+)')
+
+# AI 응답의 도구 호출 블록: [TOOL:name]```json {...} ``` / ```tool:name {...} ```
+# 두 형식을 한 번에 찾는 패턴 (그룹 1-2: [TOOL:], 그룹 3-4: ```tool:)
+TOOL_CALL_RE = re.compile(
+    r'\[TOOL:(\w+)\]\s*```(?:json)?\s*(.*?)\s*```|```tool:(\w+)\s*(.*?)\s*```',
+    re.DOTALL | re.IGNORECASE
+)
+
+# 토큰 추정용 한글 음절 연속 구간 (글자별 파이썬 루프 대신 정규식 엔진에서 스캔)
+HANGUL_RE = re.compile('[\uac00-\ud7a3]+')
+
+
 class IDEServer:
     """MAEUM_CODE Web IDE 서버"""
 
@@ -1763,11 +2955,20 @@ class IDEServer:
         print(f"   경로 존재 여부: {os.path.exists(self.workspace)}")
         print(f"   디렉토리 여부: {os.path.isdir(self.workspace)}")
 
+        # LLM 서버(7860) 공용 HTTP 클라이언트 - 연결 풀 재사용 (종료 시 app shutdown 에서 닫음)
+        # 스트리밍/abort 요청은 요청별 timeout 지정, 다른 포트는 절대 URL 사용
+        self._http = httpx.AsyncClient(
+            base_url="http://localhost:7860",
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
+
         self.app = self._create_app()
 
         # 모듈 초기화
         self.client = SmartClient()
         self.search_engine = SearchEngine(self.workspace)
+        self._bind_index_refs()
         self.tx_manager = get_tx_manager(self.workspace)
         self.classifier = ActionClassifier()
         self.code_writer = CodeWriter(self.workspace)
@@ -1775,21 +2976,41 @@ class IDEServer:
         self.code_editor = CodeEditor(self.workspace)
 
         # 코드 심볼 인덱스 (파일별 함수/클래스/변수 등) - ToolExecutor보다 먼저 초기화
-        self.symbol_index: Dict[str, dict] = {}  # {file_path: {symbols...}}
+        self.symbol_index: Dict[str, FileSymbols] = {}  # {file_path: FileSymbols}
 
         # ToolExecutor에 symbol_index와 search_engine 전달
         self.tool_executor = ToolExecutor(self.workspace, self.tx_manager, self.symbol_index, self.search_engine)
 
         # WebSocket 연결 관리
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: set[WebSocket] = set()
         self.abort_requested = False  # 생성 중단 플래그
 
+        # 브라우저 닫으면 자동 종료 (run(auto_shutdown=True) 시 활성화) - 마지막 연결이 끊기면 타이머 예약
+        self._auto_shutdown = False
+        self._shutdown_handle: Optional[asyncio.TimerHandle] = None
+
         # 대화 이력
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history: deque = deque(maxlen=HISTORY_MAX_MESSAGES)
+        self._history_tokens = 0  # conversation_history 토큰 합계 (추가/압축 시 갱신)
 
         # 컨텍스트 압축 설정 (Claude Code 패턴) - 30K 토큰 초과 시 압축
         self.context_token_limit = 30000
         self.compressed_summary = ""  # 압축된 이전 대화 요약
+        self._summary_tokens = 0  # compressed_summary 토큰 추정치 (요약 갱신 시에만 계산)
+
+        # /api/analyze/workspace 결과 캐시: (루트 mtime_ns, 계산 시각, 결과)
+        self._workspace_analysis_cache: Optional[tuple] = None
+
+        # 시스템 프롬프트 캐시 - 디렉토리 트리: ((깊이, 파일 수, 루트 mtime_ns), 계산 시각, 트리)
+        # 정적 앞부분: ((워크스페이스, 트리), 문자열)
+        self._dir_tree_cache: Optional[tuple] = None
+        self._prompt_head_cache: Optional[tuple] = None
+
+        # IDE 페이지 템플릿 캐시: (mtime_ns, HTML)
+        self._ide_html_cache: Optional[tuple] = None
+
+        # 도구 실행 단계 사이 UI 연출용 대기 (초, 0 이면 대기 없음) - /api/ui/pacing 으로 설정
+        self.ui_step_delay: float = 0.0
 
         # Agentic Loop 상태
         self.pending_tool_confirmations: Dict[str, dict] = {}  # {confirmation_id: tool_info}
@@ -1804,6 +3025,11 @@ class IDEServer:
         except Exception as e:
             print(f"   ⚠️ 디렉토리 읽기 오류: {e}")
 
+    def _bind_index_refs(self):
+        """index_stats 용 인덱스 dict 참조 (요청마다 hasattr 로 조회하지 않도록 한 번만 바인딩)"""
+        self._file_index_ref = getattr(self.search_engine, '_file_index', None)
+        self._symbol_index_ref = getattr(self.search_engine, '_symbol_index', None)
+
     def _index_workspace(self):
         """워크스페이스 인덱싱"""
         try:
@@ -1813,9 +3039,6 @@ class IDEServer:
 
     def _extract_symbols(self, file_path: str, content: str) -> dict:
         """파일에서 심볼(함수, 클래스, 변수 등) 추출 - AST 파싱"""
-        import ast
-        import re
-
         ext = os.path.splitext(file_path)[1].lower()
         symbols = {
             "file": file_path,
@@ -1826,13 +3049,21 @@ class IDEServer:
             "variables": [],
             "exports": []  # JS/TS용
         }
+        if len(content) > SYMBOL_PARSE_MAX_CHARS or symbols["lines"] > SYMBOL_PARSE_MAX_LINES:
+            symbols["parse_error"] = "too_large"
+            return symbols
 
         try:
             # ========== Python ==========
             if ext == '.py':
                 tree = ast.parse(content)
 
-                for node in ast.walk(tree):
+                # 모듈 최상위 문만 순회 (if/try/with/for 블록 안의 최상위 정의 포함)
+                # 메서드는 클래스 처리에서 수집하므로 전체 트리를 다시 훑을 필요 없음
+                todo = list(reversed(tree.body))
+                while todo:
+                    node = todo.pop()
+
                     # Import
                     if isinstance(node, ast.Import):
                         for alias in node.names:
@@ -1874,9 +3105,6 @@ class IDEServer:
 
                     # Top-level Function
                     elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        # 클래스 내부 함수는 제외 (이미 위에서 처리)
-                        if not any(isinstance(parent, ast.ClassDef) for parent in ast.walk(tree)):
-                            pass  # 복잡해서 일단 모든 함수 추가
                         symbols["functions"].append({
                             "name": node.name,
                             "line": node.lineno,
@@ -1894,6 +3122,14 @@ class IDEServer:
                                     "line": node.lineno
                                 })
 
+                    # 조건부 정의 (if TYPE_CHECKING, try/except ImportError 등)
+                    # 직속 자식 중 문(statement)만 따라감 - 표현식 노드는 건너뜀
+                    else:
+                        todo.extend(reversed([
+                            child for child in ast.iter_child_nodes(node)
+                            if isinstance(child, AST_STMT_TYPES)
+                        ]))
+
             # ========== JavaScript / TypeScript ==========
             elif ext in ['.js', '.ts', '.jsx', '.tsx']:
                 # 정규식 기반 파싱 (AST 없이)
@@ -1901,29 +3137,24 @@ class IDEServer:
 
                 for i, line in enumerate(lines, 1):
                     # import
-                    import_match = re.match(r'import\s+.*?from\s+[\'"](.+?)[\'"]', line)
+                    import_match = JS_IMPORT_RE.match(line)
                     if import_match:
                         symbols["imports"].append({"name": import_match.group(1), "line": i})
 
                     # class
-                    class_match = re.match(r'(?:export\s+)?class\s+(\w+)', line)
+                    class_match = JS_CLASS_RE.match(line)
                     if class_match:
                         symbols["classes"].append({"name": class_match.group(1), "line": i})
 
                     # function (여러 형태)
-                    func_patterns = [
-                        r'(?:export\s+)?(?:async\s+)?function\s+(\w+)',
-                        r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\(',
-                        r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\w+\s*=>'
-                    ]
-                    for pattern in func_patterns:
-                        func_match = re.match(pattern, line)
+                    for pattern in JS_FUNC_RES:
+                        func_match = pattern.match(line)
                         if func_match:
                             symbols["functions"].append({"name": func_match.group(1), "line": i})
                             break
 
                     # export
-                    export_match = re.match(r'export\s+(?:default\s+)?(\w+)', line)
+                    export_match = JS_EXPORT_RE.match(line)
                     if export_match:
                         symbols["exports"].append({"name": export_match.group(1), "line": i})
 
@@ -1933,12 +3164,12 @@ class IDEServer:
                 lines = content.split('\n')
                 for i, line in enumerate(lines, 1):
                     # def, func, function
-                    func_match = re.match(r'\s*(?:def|func|function|fn)\s+(\w+)', line)
+                    func_match = OTHER_FUNC_RE.match(line)
                     if func_match:
                         symbols["functions"].append({"name": func_match.group(1), "line": i})
 
                     # class, struct, interface
-                    class_match = re.match(r'\s*(?:class|struct|interface|type)\s+(\w+)', line)
+                    class_match = OTHER_CLASS_RE.match(line)
                     if class_match:
                         symbols["classes"].append({"name": class_match.group(1), "line": i})
 
@@ -1949,7 +3180,6 @@ class IDEServer:
 
     def _get_name(self, node) -> str:
         """AST 노드에서 이름 추출"""
-        import ast
         if isinstance(node, ast.Name):
             return node.id
         elif isinstance(node, ast.Attribute):
@@ -1963,53 +3193,68 @@ class IDEServer:
         if not self.symbol_index:
             return ""
 
-        summary_lines = ["## 📚 확인한 코드 심볼"]
+        buf = io.StringIO()
+        write = buf.write
+        write("## 📚 확인한 코드 심볼")
+
+        # 워커 스레드의 read_file 이 동시에 추가할 수 있으므로 스냅샷을 떠서 순회
+        with self.tool_executor.symbol_index_lock:
+            entries = list(self.symbol_index.items())
 
-        for file_path, symbols in self.symbol_index.items():
+        for file_path, symbols in entries:
             file_name = os.path.basename(file_path)
-            summary_lines.append(f"\n### {file_name} ({symbols.get('lines', '?')}줄)")
+            write(f"\n\n### {file_name} ({symbols.lines}줄)")
 
             # Classes
-            if symbols.get("classes"):
-                for cls in symbols["classes"]:
-                    methods = ", ".join([m["name"] for m in cls.get("methods", [])[:5]])
-                    if methods:
-                        summary_lines.append(f"  - class **{cls['name']}** (line {cls['line']}): {methods}")
-                    else:
-                        summary_lines.append(f"  - class **{cls['name']}** (line {cls['line']})")
+            for cls in symbols.classes:
+                methods = ", ".join(m.name for m in islice(cls.methods or (), 5))
+                if methods:
+                    write(f"\n  - class **{cls.name}** (line {cls.line}): {methods}")
+                else:
+                    write(f"\n  - class **{cls.name}** (line {cls.line})")
 
-            # Functions
-            if symbols.get("functions"):
-                funcs = symbols["functions"][:10]  # 최대 10개
-                func_list = ", ".join([f"{f['name']}:{f['line']}" for f in funcs])
-                summary_lines.append(f"  - functions: {func_list}")
+            # Functions (최대 10개)
+            if symbols.functions:
+                func_list = ", ".join(f"{f.name}:{f.line}" for f in islice(symbols.functions, 10))
+                write(f"\n  - functions: {func_list}")
 
             # Imports
-            if symbols.get("imports"):
-                imports = [imp["name"].split(".")[-1] for imp in symbols["imports"][:10]]
-                summary_lines.append(f"  - imports: {', '.join(imports)}")
+            if symbols.imports:
+                imports = ", ".join(imp.name.rsplit(".", 1)[-1] for imp in islice(symbols.imports, 10))
+                write(f"\n  - imports: {imports}")
 
-        return "\n".join(summary_lines)
+        return buf.getvalue()
 
     def _estimate_tokens(self, text: str) -> int:
         """토큰 수 추정 (한글은 1.5배, 영문은 0.25배)"""
-        korean_chars = sum(1 for c in text if '\uac00' <= c <= '\ud7a3')
+        if text.isascii():
+            # 코드/도구 결과 대부분은 ASCII - 한글 스캔 생략
+            return int(len(text) * 0.25)
+        # 한글을 지운 길이와의 차이 = 한글 글자 수 (정규식 한 번, 중간 리스트 없음)
+        korean_chars = len(text) - len(HANGUL_RE.sub('', text))
         other_chars = len(text) - korean_chars
         return int(korean_chars * 1.5 + other_chars * 0.25)
 
+    def _append_history(self, role: str, content: str):
+        """대화 이력에 메시지 추가 (토큰 합계도 함께 갱신)"""
+        tokens = self._estimate_tokens(content)
+        if len(self.conversation_history) == self.conversation_history.maxlen:
+            # 가장 오래된 메시지가 밀려남 - 합계에서 제외
+            self._history_tokens -= self.conversation_history[0]["tokens"]
+        self.conversation_history.append({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "tokens": tokens  # 추정치 캐시 (메시지는 추가 후 변경되지 않음)
+        })
+        self._history_tokens += tokens
+
     def _get_conversation_tokens(self) -> int:
-        """현재 대화의 총 토큰 수 계산"""
-        total = 0
-        for msg in self.conversation_history:
-            total += self._estimate_tokens(msg.get("content", ""))
-        if self.compressed_summary:
-            total += self._estimate_tokens(self.compressed_summary)
-        return total
+        """현재 대화의 총 토큰 수 (이력 합계는 증분 관리, 전체 재계산 없음)"""
+        return self._history_tokens + self._summary_tokens
 
     async def _compress_context_if_needed(self) -> bool:
         """30K 토큰 초과 시 컨텍스트 압축 (Qwen 7860 포트 사용)"""
-        import httpx
-
         current_tokens = self._get_conversation_tokens()
         if current_tokens <= self.context_token_limit:
             return False
@@ -2020,8 +3265,8 @@ class IDEServer:
         if len(self.conversation_history) <= 10:
             return False
 
-        to_compress = self.conversation_history[:-10]
-        to_keep = self.conversation_history[-10:]
+        compress_count = len(self.conversation_history) - 10
+        to_compress = list(islice(self.conversation_history, compress_count))
 
         # 압축용 텍스트 생성
         compress_text = "\n".join([
@@ -2038,33 +3283,34 @@ class IDEServer:
 JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1", "파일2"], "decisions": ["결정1"]}}"""
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "http://localhost:7860/api/chat/stream",
-                    json={
-                        "message": summary_prompt,
-                        "system_prompt": "너는 대화 요약 전문가다. 핵심만 간결하게 요약한다.",
-                        "stream": False
-                    },
-                    timeout=30
-                )
+            response = await self._http.post(
+                "/api/chat/stream",
+                json={
+                    "message": summary_prompt,
+                    "system_prompt": "너는 대화 요약 전문가다. 핵심만 간결하게 요약한다.",
+                    "stream": False
+                }
+            )
 
-                if response.status_code == 200:
-                    result = response.json()
-                    summary = result.get("content", "")
+            if response.status_code == 200:
+                result = _load_json_bytes(response.content)
+                summary = result.get("content", "")
 
-                    # 이전 요약과 합치기
-                    if self.compressed_summary:
-                        self.compressed_summary = f"[이전 요약]\n{self.compressed_summary}\n\n[새 요약]\n{summary}"
-                    else:
-                        self.compressed_summary = summary
+                # 이전 요약과 합치기
+                if self.compressed_summary:
+                    self.compressed_summary = f"[이전 요약]\n{self.compressed_summary}\n\n[새 요약]\n{summary}"
+                else:
+                    self.compressed_summary = summary
+                self._summary_tokens = self._estimate_tokens(self.compressed_summary)
 
-                    # 압축된 대화 제거, 최근 10개만 유지
-                    self.conversation_history = to_keep
+                # 압축된 대화 제거 (요약 요청 중 추가된 메시지는 유지)
+                for _ in range(compress_count):
+                    self.conversation_history.popleft()
+                self._history_tokens = sum(msg["tokens"] for msg in self.conversation_history)
 
-                    new_tokens = self._get_conversation_tokens()
-                    print(f"✅ 컨텍스트 압축 완료: {current_tokens} → {new_tokens} 토큰")
-                    return True
+                new_tokens = self._get_conversation_tokens()
+                print(f"✅ 컨텍스트 압축 완료: {current_tokens} → {new_tokens} 토큰")
+                return True
 
         except Exception as e:
             print(f"❌ 컨텍스트 압축 실패: {e}")
@@ -2076,7 +3322,8 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         app = FastAPI(
             title="MAEUM_CODE IDE",
             description="로컬 전용 웹 기반 AI 코딩 IDE",
-            version="1.0.0"
+            version="1.0.0",
+            default_response_class=DEFAULT_RESPONSE_CLASS
         )
 
         # CORS (로컬 전용)
@@ -2084,10 +3331,16 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             CORSMiddleware,
             allow_origins=["http://localhost:8880", "http://127.0.0.1:8880"],
             allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
+            allow_methods=CORS_ALLOW_METHODS,
+            allow_headers=CORS_ALLOW_HEADERS,
         )
 
+        @app.on_event("shutdown")
+        async def close_shared_resources():
+            """공용 HTTP 클라이언트 / 검색 프로세스 풀 정리"""
+            await self._http.aclose()
+            self.tool_executor.close()
+
         # 라우트 등록
         self._register_routes(app)
 
@@ -2097,7 +3350,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         """라우트 등록"""
 
         # ========== 정적 파일 (오프라인 지원) ==========
-        static_dir = Path(__file__).parent / "static"
+        static_dir = STATIC_DIR
         print(f"📁 Static 디렉토리: {static_dir}")
         print(f"📁 Static 존재 여부: {static_dir.exists()}")
         if static_dir.exists():
@@ -2141,25 +3394,31 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     raise HTTPException(status_code=400, detail="디렉토리가 아닙니다")
 
                 items = []
-                for name in sorted(os.listdir(full_path)):
-                    item_path = os.path.join(full_path, name)
-                    rel_path = os.path.relpath(item_path, self.workspace)
-
-                    # 숨김 파일/디렉토리 제외 (선택적)
-                    if name.startswith('.') and name not in ['.gitignore', '.env.example']:
-                        continue
-
-                    is_dir = os.path.isdir(item_path)
-                    stat = os.stat(item_path)
+                rel_dir = os.path.relpath(full_path, self.workspace)
+                # scandir: 항목당 stat 한 번 (isdir + stat 중복 호출 없음)
+                with os.scandir(full_path) as entries:
+                    for entry in entries:
+                        name = entry.name
+
+                        # 숨김 파일/디렉토리 제외 (선택적) - stat 전에 거름
+                        if name.startswith('.') and name not in ['.gitignore', '.env.example']:
+                            continue
 
-                    items.append({
-                        "name": name,
-                        "path": rel_path,
-                        "is_directory": is_dir,
-                        "size": stat.st_size if not is_dir else 0,
-                        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        "extension": Path(name).suffix.lower() if not is_dir else None
-                    })
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        is_dir = S_ISDIR(stat.st_mode)
+                        rel_path = name if rel_dir == '.' else os.path.join(rel_dir, name)
+
+                        items.append({
+                            "name": name,
+                            "path": rel_path,
+                            "is_directory": is_dir,
+                            "size": stat.st_size if not is_dir else 0,
+                            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                            "extension": Path(name).suffix.lower() if not is_dir else None
+                        })
 
                 # 디렉토리 먼저, 그 다음 파일
                 items.sort(key=lambda x: (not x["is_directory"], x["name"].lower()))
@@ -2184,42 +3443,32 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     raise HTTPException(status_code=400, detail="디렉토리는 읽을 수 없습니다")
 
                 # 파일 크기 제한 (10MB)
-                if os.path.getsize(full_path) > 10 * 1024 * 1024:
+                size = os.path.getsize(full_path)
+                if size > 10 * 1024 * 1024:
                     raise HTTPException(status_code=400, detail="파일이 너무 큽니다 (최대 10MB)")
 
-                # 바이너리 파일 감지
-                mime_type, _ = mimetypes.guess_type(full_path)
-                is_binary = mime_type and not mime_type.startswith('text') and \
-                           mime_type not in ['application/json', 'application/javascript',
-                                            'application/xml', 'application/x-python']
+                # 텍스트 파일 읽기 (큰 파일은 스레드에서 읽어 이벤트 루프를 막지 않음)
+                if size > ASYNC_READ_THRESHOLD:
+                    content = await asyncio.to_thread(_read_text_file, full_path)
+                else:
+                    content = _read_text_file(full_path)
 
-                if is_binary:
+                # 바이너리 파일 (앞부분에 NUL 바이트)
+                if content is None:
+                    mime_type, _ = mimetypes.guess_type(full_path)
                     return {
                         "path": path,
                         "content": None,
                         "is_binary": True,
                         "mime_type": mime_type,
-                        "size": os.path.getsize(full_path)
+                        "size": size
                     }
 
-                # 텍스트 파일 읽기
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                except UnicodeDecodeError:
-                    # 다른 인코딩 시도
-                    try:
-                        with open(full_path, 'r', encoding='cp949') as f:
-                            content = f.read()
-                    except:
-                        with open(full_path, 'r', encoding='latin-1') as f:
-                            content = f.read()
-
                 return {
                     "path": path,
                     "content": content,
                     "is_binary": False,
-                    "language": self._detect_language(path)
+                    "language": _detect_language(path, content)
                 }
 
             except HTTPException:
@@ -2230,28 +3479,26 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         @app.post("/api/file")
         async def save_file(file_data: FileContent):
             """파일 저장"""
+            began = False
             try:
                 full_path = os.path.join(self.workspace, file_data.path)
 
                 # 트랜잭션으로 저장
                 self.tx_manager.begin(f"Save {file_data.path}")
+                began = True
 
-                if os.path.exists(full_path):
-                    # 기존 파일 수정
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        old_content = f.read()
-                    self.tx_manager.write(file_data.path, file_data.content)
-                else:
+                if not os.path.exists(full_path):
                     # 새 파일 생성
                     os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    self.tx_manager.write(file_data.path, file_data.content)
+                self.tx_manager.write(file_data.path, file_data.content)
 
                 self.tx_manager.commit()
 
                 return {"success": True, "path": file_data.path}
 
             except Exception as e:
-                self.tx_manager.rollback()
+                if began:  # 다른 호출이 연 트랜잭션은 건드리지 않음
+                    self.tx_manager.rollback()
                 raise HTTPException(status_code=500, detail=str(e))
 
         @app.post("/api/file/create")
@@ -2270,6 +3517,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     with open(full_path, 'w', encoding='utf-8') as f:
                         f.write(file_data.content)
 
+                self._dir_tree_cache = None
                 return {"success": True, "path": file_data.path}
 
             except HTTPException:
@@ -2293,6 +3541,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                 os.makedirs(os.path.dirname(new_full), exist_ok=True)
                 os.rename(old_full, new_full)
 
+                self._dir_tree_cache = None
                 return {"success": True, "old_path": data.old_path, "new_path": data.new_path}
 
             except HTTPException:
@@ -2315,6 +3564,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                 else:
                     os.remove(full_path)
 
+                self._dir_tree_cache = None
                 return {"success": True, "path": path}
 
             except HTTPException:
@@ -2429,8 +3679,10 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         @app.post("/api/edit")
         async def edit_code(op: EditOperation):
             """코드 편집 (old_text -> new_text 치환)"""
+            began = False
             try:
                 self.tx_manager.begin(f"Edit {op.path}")
+                began = True
                 success = self.tx_manager.edit(op.path, op.old_text, op.new_text)
                 if success:
                     self.tx_manager.commit()
@@ -2441,7 +3693,8 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             except HTTPException:
                 raise
             except Exception as e:
-                self.tx_manager.rollback()
+                if began:  # 다른 호출이 연 트랜잭션은 건드리지 않음
+                    self.tx_manager.rollback()
                 raise HTTPException(status_code=500, detail=str(e))
 
         @app.post("/api/edit/batch")
@@ -2532,6 +3785,9 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             """검색 인덱스 새로고침"""
             try:
                 self.search_engine.index_codebase()
+                self._bind_index_refs()
+                self._workspace_analysis_cache = None
+                self._dir_tree_cache = None
                 return {"success": True, "message": "인덱스 갱신 완료"}
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
@@ -2542,8 +3798,8 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             try:
                 return {
                     "workspace": self.workspace,
-                    "file_count": len(self.search_engine.file_index) if hasattr(self.search_engine, 'file_index') else 0,
-                    "symbol_count": len(self.search_engine.symbol_index) if hasattr(self.search_engine, 'symbol_index') else 0
+                    "file_count": len(self._file_index_ref) if self._file_index_ref is not None else 0,
+                    "symbol_count": len(self._symbol_index_ref) if self._symbol_index_ref is not None else 0
                 }
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
@@ -2553,12 +3809,14 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         @app.get("/api/chat/history")
         async def get_chat_history():
             """대화 이력 조회"""
-            return {"history": self.conversation_history[-50:]}  # 최근 50개
+            history = self.conversation_history
+            return {"history": list(islice(history, max(0, len(history) - 50), None))}  # 최근 50개
 
         @app.delete("/api/chat/history")
         async def clear_chat_history():
             """대화 이력 삭제"""
             self.conversation_history.clear()
+            self._history_tokens = 0
             return {"success": True}
 
         # ========== 파일 분석 API ==========
@@ -2568,26 +3826,30 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             """파일 분석"""
             try:
                 full_path = os.path.join(self.workspace, path)
-                if not os.path.exists(full_path):
+
+                # 파일 정보 (존재 확인 겸 stat 한 번)
+                try:
+                    stat = os.stat(full_path)
+                except (FileNotFoundError, NotADirectoryError):
                     raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-                # 파일 정보
-                stat = os.stat(full_path)
+                language = _detect_language(path)
 
-                # 심볼 검색
+                # 심볼 검색 (코드 파일만 - 이미지/lock 파일 등은 검색 엔진 호출 생략)
                 symbols = []
-                try:
-                    result = self.search_engine.find_symbol("", file_filter=path)
-                    if hasattr(result, 'matches'):
-                        symbols = [{"name": m.content, "line": m.line} for m in result.matches[:20]]
-                except:
-                    pass
+                if language in CODE_LANGS:
+                    try:
+                        result = self.search_engine.find_symbol("", file_filter=path)
+                        if hasattr(result, 'matches'):
+                            symbols = [{"name": m.content, "line": m.line} for m in result.matches[:20]]
+                    except:
+                        pass
 
                 return {
                     "path": path,
                     "size": stat.st_size,
                     "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    "language": self._detect_language(path),
+                    "language": language,
                     "symbols": symbols
                 }
             except HTTPException:
@@ -2599,10 +3861,17 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         async def analyze_workspace():
             """워크스페이스 분석"""
             try:
+                # 루트 mtime 이 같고 TTL 이내면 이전 결과 재사용 (대시보드 폴링 대비)
+                root_mtime = os.stat(self.workspace).st_mtime_ns
+                now = time.monotonic()
+                cached = self._workspace_analysis_cache
+                if cached and cached[0] == root_mtime and now - cached[1] < WORKSPACE_ANALYSIS_TTL:
+                    return cached[2]
+
                 # 코드베이스 컨텍스트 분석
                 try:
                     context = self.code_writer.analyze_context()
-                    return {
+                    result = {
                         "root_path": context.root_path,
                         "structure_summary": context.structure_summary,
                         "pattern": context.pattern,
@@ -2610,27 +3879,32 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     }
                 except:
                     # 간단한 분석
-                    file_count = 0
-                    ext_counts = {}
-                    for root, dirs, files in os.walk(self.workspace):
-                        # 숨김 폴더 제외
-                        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
-                        for f in files:
-                            if not f.startswith('.'):
-                                file_count += 1
-                                ext = Path(f).suffix.lower()
-                                ext_counts[ext] = ext_counts.get(ext, 0) + 1
+                    file_count, ext_counts = _tally_workspace(self.workspace)
 
-                    return {
+                    result = {
                         "root_path": self.workspace,
                         "file_count": file_count,
-                        "extensions": dict(sorted(ext_counts.items(), key=lambda x: -x[1])[:10])
+                        "extensions": dict(ext_counts.most_common(10))
                     }
+
+                self._workspace_analysis_cache = (root_mtime, now, result)
+                return result
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
         # ========== AI 상태 API ==========
 
+        @app.get("/api/ui/pacing")
+        async def get_ui_pacing():
+            """도구 실행 UI 대기 설정 조회"""
+            return {"step_delay": self.ui_step_delay}
+
+        @app.post("/api/ui/pacing")
+        async def set_ui_pacing(pacing: UIPacing):
+            """도구 실행 UI 대기 설정 (0 이면 대기 없음, 범위 밖 값은 422)"""
+            self.ui_step_delay = pacing.step_delay
+            return {"success": True, "step_delay": self.ui_step_delay}
+
         @app.get("/api/ai/status")
         async def ai_status():
             """AI 서버 상태"""
@@ -2656,14 +3930,15 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         async def websocket_chat(websocket: WebSocket):
             """AI 채팅 WebSocket with Agentic Loop"""
             await websocket.accept()
-            self.active_connections.append(websocket)
+            self.active_connections.add(websocket)
+            self._cancel_auto_shutdown()
             cancelled = False  # ESC 취소 플래그
 
             try:
                 while True:
                     # 메시지 수신
                     data = await websocket.receive_text()
-                    message_data = json.loads(data)
+                    message_data = _load_json_bytes(data)
 
                     msg_type = message_data.get("type", "chat")
 
@@ -2690,17 +3965,14 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                                 tool_name = tool_info["tool_name"]
                                 tool_input = tool_info["tool_input"]
 
-                                result = self.tool_executor.execute(tool_name, tool_input)
+                                result = await self.tool_executor.execute_async(tool_name, tool_input)
 
-                                await websocket.send_json({
-                                    "type": "tool_result",
-                                    "tool_name": tool_name,
-                                    "result": result
-                                })
+                                tool_result_str = await self._send_tool_result(websocket, tool_name, result)
 
                                 # 파일 수정 도구면 에디터 새로고침 요청
                                 file_path = tool_input.get("file_path") or tool_input.get("path")
                                 if tool_name in ["edit_file", "write_file"] and result.get("success"):
+                                    self._dir_tree_cache = None
                                     await websocket.send_json({
                                         "type": "file_modified",
                                         "file_path": file_path,
@@ -2712,7 +3984,6 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                                 # 저장된 맥락으로 루프 계속
                                 if hasattr(self, '_pending_loop_context'):
                                     ctx = self._pending_loop_context
-                                    tool_result_str = json.dumps(result, ensure_ascii=False, indent=2)
                                     continue_message = f"""
 도구 실행 결과:
 ```json
@@ -2769,11 +4040,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     print(f"🏷️ 분류: {classification.action.name} (신뢰도: {classification.confidence:.2f})")
 
                     # 대화 이력에 추가
-                    self.conversation_history.append({
-                        "role": "user",
-                        "content": user_message,
-                        "timestamp": datetime.now().isoformat()
-                    })
+                    self._append_history("user", user_message)
 
                     # 컨텍스트 압축 체크 (30K 토큰 초과 시)
                     compressed = await self._compress_context_if_needed()
@@ -2801,12 +4068,12 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                         })
 
             except WebSocketDisconnect:
-                if websocket in self.active_connections:
-                    self.active_connections.remove(websocket)
+                self.active_connections.discard(websocket)
+                self._schedule_auto_shutdown()
             except Exception as e:
                 print(f"WebSocket 오류: {e}")
-                if websocket in self.active_connections:
-                    self.active_connections.remove(websocket)
+                self.active_connections.discard(websocket)
+                self._schedule_auto_shutdown()
 
     async def _run_agentic_loop(
         self,
@@ -2816,15 +4083,19 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         max_iterations: int = 99
     ):
         """Agentic Loop 실행 (maeum_code.py 스타일)"""
-        import httpx
         import uuid
 
-        full_response = ""
+        full_response_parts: List[str] = []  # 반복마다의 응답 (필요할 때만 join)
         iteration = 0
         exploration_count = 0  # 탐색 도구 카운터
         max_exploration = 20  # 탐색 도구 최대 횟수
         exploration_tools = {"list_dir", "read_file", "search_code"}  # 탐색 도구 목록
 
+        # 프롬프트에는 원래 요청 + 최근 도구 결과만 유지 (반복마다 누적되어 커지지 않도록)
+        original_user_message = user_message
+        tool_result_tail = deque(maxlen=TOOL_RESULT_CONTEXT_TURNS)
+        exploration_notice = ""
+
         self.abort_requested = False  # 새 대화 시작 시 리셋
 
         while iteration < max_iterations:
@@ -2841,28 +4112,28 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             try:
                 full_message = f"{system_prompt}\n\n사용자: {user_message}"
 
-                if full_response:
-                    full_message += f"\n\n이전 응답:\n{full_response[-2000:]}"
+                if full_response_parts:
+                    full_message += f"\n\n이전 응답:\n{_join_tail(full_response_parts, 2000)}"
 
                 token_queue = asyncio.Queue()
 
                 async def generate():
                     try:
-                        async with httpx.AsyncClient(timeout=120.0) as client:
-                            async with client.stream(
-                                "POST",
-                                "http://localhost:7860/api/chat/stream",
-                                json={"message": full_message}
-                            ) as response:
-                                async for line in response.aiter_lines():
-                                    if line.startswith("data: "):
-                                        try:
-                                            chunk = json.loads(line[6:])
-                                            token = chunk.get("token") or chunk.get("content", "")
-                                            if token:
-                                                await token_queue.put(("token", token))
-                                        except:
-                                            pass
+                        async with self._http.stream(
+                            "POST",
+                            "/api/chat/stream",
+                            json={"message": full_message},
+                            timeout=120.0
+                        ) as response:
+                            async for line in response.aiter_lines():
+                                if line.startswith("data: "):
+                                    try:
+                                        chunk = _load_json_bytes(line[6:])
+                                        token = chunk.get("token") or chunk.get("content", "")
+                                        if token:
+                                            await token_queue.put(("token", token))
+                                    except:
+                                        pass
                         await token_queue.put(("done", None))
                     except Exception as e:
                         await token_queue.put(("error", str(e)))
@@ -2876,20 +4147,50 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                 tool_detected = None  # 감지된 도구 정보
                 tool_block_buffer = ""
                 in_tool_block = False
+                scan_offset = 0  # 이 위치 이전은 [TOOL: 검사 완료 (전체 응답 재검색 방지)
+                backtick_count = 0  # tool_block_buffer 안의 ``` 개수 (새 토큰 부분만 세어 누적)
+
+                # 토큰마다 보내지 않고 모아서 전송 (TOKEN_BATCH_CHARS 글자 또는 TOKEN_BATCH_INTERVAL 초마다)
+                loop = asyncio.get_running_loop()
+                sent_len = 0  # display_buffer 중 클라이언트에 보낸 길이
+                last_flush = loop.time()
+
+                async def flush_display():
+                    """display_buffer 중 아직 보내지 않은 부분을 한 번에 전송"""
+                    nonlocal sent_len, last_flush
+                    if len(display_buffer) > sent_len:
+                        await websocket.send_text(_dump_json_str({
+                            "type": "token",
+                            "content": display_buffer[sent_len:]
+                        }))
+                        sent_len = len(display_buffer)
+                    last_flush = loop.time()
 
                 while True:
-                    msg_type, content = await token_queue.get()
+                    if len(display_buffer) > sent_len and token_queue.empty():
+                        # 보내지 않은 텍스트가 있으면 묶음 간격까지만 대기 - 모델이 멈춰도 늦지 않게 표시
+                        try:
+                            msg_type, content = await asyncio.wait_for(
+                                token_queue.get(), last_flush + TOKEN_BATCH_INTERVAL - loop.time()
+                            )
+                        except asyncio.TimeoutError:
+                            await flush_display()
+                            continue
+                    else:
+                        msg_type, content = await token_queue.get()
 
                     if msg_type == "token":
                         current_response += content
 
                         # 도구 블록 내부라면 버퍼에만 추가
                         if in_tool_block:
+                            # 토큰 경계에 걸친 ``` 도 잡도록 기존 끝 2글자부터 검사
+                            fence_from = max(0, len(tool_block_buffer) - 2)
                             tool_block_buffer += content
                             # 도구 블록 완료 확인 (``` 열고 닫힘)
-                            backtick_count = tool_block_buffer.count("```")
+                            backtick_count += tool_block_buffer.count("```", fence_from)
                             if backtick_count >= 2:
-                                # 도구 파싱 시도
+                                # 도구 파싱 시도 (응답 후처리와 같은 _find_tools 경로)
                                 tool_detected = self._parse_tool_block(tool_block_buffer)
                                 if tool_detected:
                                     # 도구 감지됨 - 즉시 스트리밍 중단!
@@ -2915,38 +4216,35 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                                     print(f"⚠️ Tool parse failed, treating as text")
                                     in_tool_block = False
                                     # 버퍼링된 텍스트 표시
-                                    await websocket.send_json({
-                                        "type": "token",
-                                        "content": tool_block_buffer
-                                    })
                                     display_buffer += tool_block_buffer
+                                    await flush_display()
                                     tool_block_buffer = ""
+                                    backtick_count = 0
+                                    scan_offset = len(current_response)  # 실패한 블록은 다시 검사하지 않음
                         else:
-                            # [TOOL: 시작 감지
-                            if "[TOOL:" in current_response and not in_tool_block:
+                            # [TOOL: 시작 감지 - 새 토큰 주변만 검사 (토큰 경계에 걸친 마커 포함)
+                            tool_idx = current_response.find(
+                                "[TOOL:", max(scan_offset, len(current_response) - len(content) - 5)
+                            )
+                            if tool_idx >= 0:
                                 in_tool_block = True
-                                # [TOOL: 이전 텍스트만 표시
-                                before_tool = current_response.split("[TOOL:")[0]
-                                if before_tool and before_tool.strip() and before_tool not in display_buffer:
-                                    new_text = before_tool[len(display_buffer):]
-                                    if new_text:
-                                        await websocket.send_json({
-                                            "type": "token",
-                                            "content": new_text
-                                        })
-                                display_buffer = before_tool
-                                tool_block_buffer = "[TOOL:" + current_response.split("[TOOL:", 1)[1]
+                                # [TOOL: 이전 텍스트만 표시 (display_buffer 는 항상 current_response 의 앞부분)
+                                display_buffer = current_response[:tool_idx]
+                                await flush_display()
+                                tool_block_buffer = current_response[tool_idx:]
+                                backtick_count = tool_block_buffer.count("```")
                             else:
                                 # 일반 텍스트 표시
-                                await websocket.send_json({
-                                    "type": "token",
-                                    "content": content
-                                })
                                 display_buffer += content
+                                if (len(display_buffer) - sent_len >= TOKEN_BATCH_CHARS
+                                        or loop.time() - last_flush >= TOKEN_BATCH_INTERVAL):
+                                    await flush_display()
 
                     elif msg_type == "done":
+                        await flush_display()
                         break
                     elif msg_type == "error":
+                        await flush_display()
                         await websocket.send_json({
                             "type": "error",
                             "content": content
@@ -2964,7 +4262,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                     except:
                         pass
 
-                full_response += current_response
+                full_response_parts.append(current_response)
 
                 # 도구 감지 확인
                 if not tool_detected:
@@ -2977,11 +4275,8 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
 
                 if not tool_calls:
                     # 도구 호출 없음 → 완료
-                    self.conversation_history.append({
-                        "role": "assistant",
-                        "content": full_response[:500],
-                        "timestamp": datetime.now().isoformat()
-                    })
+                    full_response = "".join(full_response_parts)
+                    self._append_history("assistant", full_response[:500])
                     await websocket.send_json({
                         "type": "done",
                         "content": full_response
@@ -3008,7 +4303,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                             "system_prompt": system_prompt,
                             "stream": stream,
                             "user_message": user_message,
-                            "full_response": full_response
+                            "full_response": "".join(full_response_parts)
                         }
 
                         await websocket.send_json({
@@ -3039,7 +4334,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                                     "content": f"\n\n---\n충분히 탐색했습니다. 이제 파악한 내용을 정리해드리겠습니다.\n\n"
                                 })
                                 # 도구 실행 없이 다음 턴으로 - LLM에게 부드럽게 안내
-                                user_message += f"""
+                                exploration_notice = f"""
 
 ---
 [시스템 안내]
@@ -3047,6 +4342,7 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
 지금까지 수집한 정보를 바탕으로 사용자의 질문에 답변해주세요.
 추가 탐색 없이, 파악한 내용을 명확하게 정리해서 설명해주세요.
 """
+                                user_message = original_user_message + "".join(tool_result_tail) + exploration_notice
                                 continue
 
                         # Step 1: 실행 시작 알림
@@ -3058,8 +4354,10 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                             "max_exploration": max_exploration
                         })
 
-                        # Step-by-step: 0.5초 대기 (사용자가 볼 수 있도록)
-                        await asyncio.sleep(0.5)
+                        # Step-by-step 대기 (설정 시에만, 연속 탐색 도구는 생략)
+                        step_delay = self.ui_step_delay if tool_name not in exploration_tools else 0.0
+                        if step_delay:
+                            await asyncio.sleep(step_delay)
 
                         # Step 2: 파일 관련 도구는 에디터에서 열기
                         file_path = tool_input.get("path") or tool_input.get("file_path")
@@ -3070,30 +4368,26 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                                 "tool_name": tool_name,
                                 "line": tool_input.get("line", 1)  # 특정 라인으로 이동
                             })
-                            await asyncio.sleep(0.3)  # 에디터 열릴 시간
 
-                        result = self.tool_executor.execute(tool_name, tool_input)
+                        result = await self.tool_executor.execute_async(tool_name, tool_input)
 
                         # Step 3: 결과 전송
-                        await asyncio.sleep(0.3)
-                        await websocket.send_json({
-                            "type": "tool_result",
-                            "tool_name": tool_name,
-                            "result": result,
-                            "file_path": file_path  # 에디터 업데이트용
-                        })
+                        if step_delay:
+                            await asyncio.sleep(step_delay)
+                        tool_result_str = await self._send_tool_result(
+                            websocket, tool_name, result, file_path=file_path  # 에디터 업데이트용
+                        )
 
                         # Step 4: 파일 수정 도구면 에디터 새로고침 요청
                         if tool_name in ["edit_file", "write_file"] and result.get("success"):
+                            self._dir_tree_cache = None
                             await websocket.send_json({
                                 "type": "file_modified",
                                 "file_path": file_path,
                                 "action": result.get("action", "modified")
                             })
 
-                        # 결과를 컨텍스트에 추가 (맥락 유지)
-                        tool_result_str = json.dumps(result, ensure_ascii=False, indent=2)
-
+                        # 결과를 컨텍스트에 추가 (맥락 유지) - tool_result_str 은 위에서 전송한 JSON 재사용
                         # 탐색 횟수 안내 추가
                         remaining = max_exploration - exploration_count
                         exploration_hint = f"\n(탐색 {exploration_count}/{max_exploration}회 사용)" if tool_name in exploration_tools else ""
@@ -3111,7 +4405,8 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
 - 연관된 코드를 찾으려면 search_code를 사용하세요.
 - 충분히 이해했으면 사용자에게 설명하세요.
 """
-                        user_message = f"{user_message}{context_update}"
+                        tool_result_tail.append(context_update)
+                        user_message = original_user_message + "".join(tool_result_tail) + exploration_notice
 
             except Exception as e:
                 print(f"❌ Agentic Loop 오류: {e}")
@@ -3124,192 +4419,94 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         # 최대 반복 도달
         await websocket.send_json({
             "type": "done",
-            "content": full_response + "\n\n[최대 반복 횟수 도달]"
+            "content": "".join(full_response_parts) + "\n\n[최대 반복 횟수 도달]"
         })
 
+    async def _send_tool_result(self, websocket: WebSocket, tool_name: str, result: dict, **extra) -> str:
+        """tool_result 메시지 전송 - 결과는 한 번만 직렬화하고 그 문자열을 반환 (LLM 컨텍스트용)
+
+        Returns:
+            들여쓰기 2칸 JSON 문자열
+        """
+        result_json = _dump_json_bytes(result).decode('utf-8')
+        header = {"type": "tool_result", "tool_name": tool_name, **extra}
+        # {"type": ..., "result": <result_json>} - 직렬화된 결과를 그대로 끼워 넣음
+        await websocket.send_text(
+            _dump_json_str(header)[:-1] + ',"result":' + result_json + '}'
+        )
+        return result_json
+
     async def _send_abort_signal(self):
         """KoboldCpp에 abort 신호 전송 (Qwen 12345, Gemma 12346)"""
-        try:
-            async with httpx.AsyncClient() as client:
-                # Qwen (12345) abort
-                try:
-                    await client.post(
-                        "http://localhost:12345/api/extra/abort",
-                        timeout=2.0
-                    )
-                    print("🛑 KoboldCpp (Qwen 12345) abort signal sent")
-                except:
-                    pass
+        # 두 엔드포인트에 동시에 전송 (죽은 쪽의 timeout 이 살아있는 쪽을 막지 않도록)
+        results = await asyncio.gather(
+            *(self._http.post(url, timeout=2.0) for _, url in ABORT_ENDPOINTS),
+            return_exceptions=True
+        )
+        for (label, _), result in zip(ABORT_ENDPOINTS, results):
+            if isinstance(result, BaseException):
+                continue
+            print(f"🛑 KoboldCpp ({label}) abort signal sent")
 
-                # 7860 포트도 시도 (통합 서버)
-                try:
-                    await client.post(
-                        "http://localhost:7860/api/extra/abort",
-                        timeout=2.0
-                    )
-                    print("🛑 KoboldCpp (7860) abort signal sent")
-                except:
-                    pass
-        except Exception as e:
-            print(f"⚠️ Abort signal failed: {e}")
-
-    def _parse_tool_block(self, tool_block: str) -> Optional[dict]:
-        """
-        [TOOL:xxx]```json {...} ``` 형식의 도구 블록 파싱
+    def _find_tools(self, text: str, limit: Optional[int] = None) -> List[dict]:
+        """텍스트에서 도구 호출 추출 - 두 형식을 TOOL_CALL_RE 한 번의 순회로 처리
 
         Args:
-            tool_block: [TOOL:name]```json ... ``` 형식의 문자열
+            text: AI 응답 또는 도구 블록
+            limit: 최대 개수 (None 이면 전부)
 
         Returns:
-            {"name": "tool_name", "input": {...}} 또는 None
+            [{"name": "tool_name", "input": {...}}, ...] - 등장 순서, 같은 호출은 한 번만
         """
-        import re
-
-        # 패턴: [TOOL:tool_name]```json? {...} ```
-        pattern = r'\[TOOL:(\w+)\]\s*```(?:json)?\s*(.*?)\s*```'
-        match = re.search(pattern, tool_block, re.DOTALL | re.IGNORECASE)
-
-        if match:
-            tool_name = match.group(1)
-            json_str = match.group(2).strip()
+        tool_calls = []
+        seen = set()
 
+        for match in TOOL_CALL_RE.finditer(text):
+            # [TOOL:name]```json ... ``` 또는 ```tool:name ... ```
+            tool_name = match.group(1) or match.group(3)
+            json_str = match.group(2) if match.group(1) else match.group(4)
             try:
-                tool_input = json.loads(json_str)
-                return {
-                    "name": tool_name,
-                    "input": tool_input
-                }
-            except json.JSONDecodeError as e:
+                tool_input = _load_json_bytes(json_str)
+            except ValueError as e:
                 print(f"⚠️ Tool JSON parse error: {e}")
                 print(f"   Raw JSON: {json_str[:100]}...")
-                return None
-
-        # 대체 패턴: ```tool:name {...} ```
-        alt_pattern = r'```tool:(\w+)\s*(.*?)\s*```'
-        alt_match = re.search(alt_pattern, tool_block, re.DOTALL | re.IGNORECASE)
-
-        if alt_match:
-            tool_name = alt_match.group(1)
-            json_str = alt_match.group(2).strip()
-
-            try:
-                tool_input = json.loads(json_str)
-                return {
-                    "name": tool_name,
-                    "input": tool_input
-                }
-            except:
-                return None
-
-        return None
+                continue
 
-    def _detect_tool_calls(self, response: str) -> List[dict]:
-        """AI 응답에서 도구 호출 감지"""
-        import re
-
-        tool_calls = []
-
-        # 패턴: [TOOL:tool_name]{json_input}
-        pattern = r'\[TOOL:(\w+)\]\s*```json?\s*(.*?)\s*```'
-        matches = re.findall(pattern, response, re.DOTALL | re.IGNORECASE)
-
-        for tool_name, json_str in matches:
-            try:
-                tool_input = json.loads(json_str)
+            key = (tool_name, _canonical_json(tool_input))
+            if key not in seen:
+                seen.add(key)
                 tool_calls.append({
                     "name": tool_name,
                     "input": tool_input
                 })
-            except:
-                pass
+                if limit is not None and len(tool_calls) >= limit:
+                    break
 
-        # 대체 패턴: ```tool:name ... ```
-        alt_pattern = r'```tool:(\w+)\s*(.*?)\s*```'
-        alt_matches = re.findall(alt_pattern, response, re.DOTALL | re.IGNORECASE)
+        return tool_calls
 
-        for tool_name, json_str in alt_matches:
-            try:
-                tool_input = json.loads(json_str)
-                if {"name": tool_name, "input": tool_input} not in tool_calls:
-                    tool_calls.append({
-                        "name": tool_name,
-                        "input": tool_input
-                    })
-            except:
-                pass
+    def _parse_tool_block(self, tool_block: str) -> Optional[dict]:
+        """
+        [TOOL:xxx]```json {...} ``` 형식의 도구 블록 파싱
 
-        return tool_calls
+        Args:
+            tool_block: [TOOL:name]```json ... ``` 형식의 문자열
+
+        Returns:
+            {"name": "tool_name", "input": {...}} 또는 None
+        """
+        found = self._find_tools(tool_block, limit=1)
+        return found[0] if found else None
+
+    def _detect_tool_calls(self, response: str) -> List[dict]:
+        """AI 응답에서 도구 호출 감지"""
+        return self._find_tools(response)
 
     def _get_tool_description(self, tool_name: str, tool_input: dict) -> str:
         """도구 실행 설명 생성"""
-        if tool_name == "bash":
-            return f"명령어 실행: {tool_input.get('command', '')}"
-        elif tool_name == "write_file":
-            path = tool_input.get('file_path', '')
-            size = len(tool_input.get('content', ''))
-            return f"파일 작성: {path} ({size}자)"
-        elif tool_name == "edit_file":
-            path = tool_input.get('file_path', '')
-            return f"파일 수정: {path}"
-        elif tool_name == "read_file":
-            return f"파일 읽기: {tool_input.get('file_path', '')}"
-        elif tool_name == "list_dir":
-            return f"디렉토리 목록: {tool_input.get('path', '/')}"
-        elif tool_name == "search_code":
-            return f"코드 검색: {tool_input.get('query', '')}"
-        return f"{tool_name}: {json.dumps(tool_input)}"
-
-    def _detect_language(self, path: str) -> str:
-        """파일 확장자로 언어 감지"""
-        ext_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.jsx': 'javascript',
-            '.html': 'html',
-            '.css': 'css',
-            '.scss': 'scss',
-            '.json': 'json',
-            '.md': 'markdown',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.xml': 'xml',
-            '.sql': 'sql',
-            '.sh': 'shell',
-            '.bash': 'shell',
-            '.zsh': 'shell',
-            '.c': 'c',
-            '.cpp': 'cpp',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.java': 'java',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.rb': 'ruby',
-            '.php': 'php',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-            '.r': 'r',
-            '.R': 'r',
-            '.lua': 'lua',
-            '.pl': 'perl',
-            '.dockerfile': 'dockerfile',
-            '.toml': 'toml',
-            '.ini': 'ini',
-            '.cfg': 'ini',
-            '.env': 'shell',
-        }
-        ext = Path(path).suffix.lower()
-        name = Path(path).name.lower()
-
-        if name == 'dockerfile':
-            return 'dockerfile'
-        if name == 'makefile':
-            return 'makefile'
-
-        return ext_map.get(ext, 'plaintext')
+        describe = TOOL_DESCRIBERS.get(tool_name)
+        if describe:
+            return describe(tool_input)
+        return f"{tool_name}: {_dump_json_str(tool_input)}"
 
     def _format_search_results(self, results) -> List[Dict]:
         """검색 결과 포맷팅"""
@@ -3324,33 +4521,53 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
                 for m in results.matches[:100]  # 최대 100개
             ]
         elif isinstance(results, list):
-            return [
-                {
-                    "file": str(r) if isinstance(r, (str, Path)) else r.get('file', str(r)),
-                    "line": r.get('line', 0) if isinstance(r, dict) else 0,
-                    "content": r.get('content', '') if isinstance(r, dict) else ''
-                }
-                for r in results[:100]
-            ]
+            # 결과 목록은 한 종류로 채워지므로 첫 항목으로 형식을 한 번만 판별
+            rows = results[:100]
+            if not rows:
+                return []
+            first = rows[0]
+            if isinstance(first, dict):  # find_symbol
+                return [
+                    {"file": r.get('file', str(r)), "line": r.get('line', 0), "content": r.get('content', '')}
+                    for r in rows
+                ]
+            if hasattr(first, 'relative_path'):  # find_files (FileInfo)
+                return [{"file": r.relative_path, "line": 0, "content": ''} for r in rows]
+            return [{"file": str(r), "line": 0, "content": ''} for r in rows]
         return []
 
     def _get_directory_tree(self, max_depth: int = 3, max_files: int = 100) -> str:
-        """디렉토리 트리 생성"""
+        """디렉토리 트리 생성 (루트 mtime 이 같고 TTL 이내면 이전 결과 재사용)"""
+        cache_key = (max_depth, max_files, os.stat(self.workspace).st_mtime_ns)
+        now = time.monotonic()
+        cached = self._dir_tree_cache
+        if cached and cached[0] == cache_key and now - cached[1] < DIR_TREE_TTL:
+            return cached[2]
+
         tree_lines = []
         file_count = 0
+        done = False  # 파일 수 또는 줄 수 한도 도달 → 남은 디렉토리는 열지 않음
 
         def walk_dir(path: str, prefix: str = "", depth: int = 0):
-            nonlocal file_count
-            if depth > max_depth or file_count > max_files:
+            nonlocal file_count, done
+            if done or depth > max_depth:
                 return
 
             try:
-                items = sorted(os.listdir(path))
-                # 숨김 파일/폴더 제외
-                items = [i for i in items if not i.startswith('.') and i not in ['__pycache__', 'node_modules', 'venv', '.git']]
-
-                dirs = [i for i in items if os.path.isdir(os.path.join(path, i))]
-                files = [i for i in items if os.path.isfile(os.path.join(path, i))]
+                # scandir 는 getdents 결과의 d_type 을 재사용 → 항목마다 isdir/isfile stat 호출 없음
+                dirs, files = [], []
+                with os.scandir(path) as it:
+                    for entry in it:
+                        name = entry.name
+                        # 숨김 파일/폴더 제외
+                        if name.startswith('.') or name in DIR_TREE_EXCLUDE:
+                            continue
+                        if entry.is_dir():
+                            dirs.append(name)
+                        elif entry.is_file():
+                            files.append(name)
+                dirs.sort()
+                files.sort()
 
                 # 파일 먼저
                 for f in files[:20]:  # 폴더당 최대 20개 파일
@@ -3364,10 +4581,14 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
 
                 # 디렉토리
                 for d in dirs[:10]:  # 최대 10개 하위 디렉토리
-                    if file_count > max_files:
-                        break
+                    # 어차피 잘릴 줄은 만들지 않음
+                    if file_count > max_files or len(tree_lines) >= DIR_TREE_MAX_LINES:
+                        done = True
+                        return
                     tree_lines.append(f"{prefix}📁 {d}/")
                     walk_dir(os.path.join(path, d), prefix + "  ", depth + 1)
+                    if done:
+                        return
 
             except PermissionError:
                 pass
@@ -3375,24 +4596,33 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
         tree_lines.append(f"📁 {os.path.basename(self.workspace)}/")
         walk_dir(self.workspace, "  ")
 
-        return "\n".join(tree_lines[:150])  # 최대 150줄
+        tree = "\n".join(tree_lines[:DIR_TREE_MAX_LINES])
+        self._dir_tree_cache = (cache_key, now, tree)
+        return tree
 
     def _read_file_content(self, file_path: str, max_lines: int = 100) -> str:
         """파일 내용 읽기 (AI용)"""
         full_path = os.path.join(self.workspace, file_path)
-        if not os.path.exists(full_path) or not os.path.isfile(full_path):
+        if not os.path.isfile(full_path):
             return f"[파일을 찾을 수 없음: {file_path}]"
 
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()[:max_lines]
+            # 앞부분만 읽고, 잘린 경우 같은 핸들로 나머지 줄 수만 셈 (파일 전체를 메모리에 올리지 않음)
+            # 큰 버퍼로 열어 대용량 파일의 read() 시스템 콜 횟수를 줄임
+            with open(full_path, 'r', encoding='utf-8', buffering=FILE_READ_BUFFER) as f:
+                lines = list(islice(f, max_lines))
                 content = ''.join(lines)
                 if len(lines) == max_lines:
-                    content += f"\n... (이하 생략, 총 {sum(1 for _ in open(full_path))}줄)"
+                    total = max_lines + sum(1 for _ in f)
+                    content += f"\n... (이하 생략, 총 {total}줄)"
                 return content
         except Exception as e:
             return f"[파일 읽기 오류: {e}]"
 
+    def _render_prompt_head(self, dir_tree: str) -> str:
+        """시스템 프롬프트 정적 부분 생성 (워크스페이스/디렉토리 트리만 바뀜)"""
+        return PROMPT_HEADER_TEMPLATE.format(workspace=self.workspace, dir_tree=dir_tree) + PROMPT_TOOL_DOCS
+
     def _build_system_prompt(self, context: str = "", classification=None) -> str:
         """Build Qwen-optimized system prompt for MAEUM_CODE"""
         # Generate directory tree
@@ -3410,9 +4640,164 @@ JSON 형식으로 답변: {{"summary": "요약 내용", "key_files": ["파일1",
             }
             task_mode = task_modes.get(action_name, "")
 
-        # Qwen-optimized System Prompt
-        # Qwen responds well to: clear role, structured instructions, explicit tool format
-        base_prompt = f"""# Role: MAEUM_CODE Assistant - The Curious Code Explorer
+        # 정적인 앞부분 (역할/도구 설명 + 디렉토리 트리) - 트리가 같으면 이전 문자열 재사용
+        head_key = (self.workspace, dir_tree)
+        cached = self._prompt_head_cache
+        if cached and cached[0] == head_key:
+            head = cached[1]
+        else:
+            head = self._render_prompt_head(dir_tree)
+            self._prompt_head_cache = (head_key, head)
+
+        # 섹션을 리스트에 모아 마지막에 한 번만 join (+= 반복 시 매번 전체 문자열 복사)
+        parts = [head]
+
+        if task_mode:
+            parts.append(f"\n## Current Task Mode: {task_mode}\n")
+
+        # 현재 열린 파일 정보 추가
+        if hasattr(self, 'current_file_info') and self.current_file_info:
+            cf = self.current_file_info
+            parts.append(f"""
+## 📄 Currently Open File
+- **Path**: `{cf.get('path', 'unknown')}`
+- **Language**: {cf.get('language', 'unknown')}
+- **Total Lines**: {cf.get('totalLines', 0)}
+- **Cursor at Line**: {cf.get('cursorLine', 1)}
+
+**Important**: When the user says "이 파일", "여기", "이 코드" they mean THIS file.
+""")
+
+        # 열린 탭 목록 추가
+        if hasattr(self, 'open_tabs_info') and self.open_tabs_info:
+            tabs_list = ", ".join([f"`{t}`" for t in self.open_tabs_info[:10]])
+            parts.append(f"\n## 📑 Open Tabs\n{tabs_list}\n")
+
+        if context:
+            parts.append(f"\n## Current Code Context (around cursor)\n```\n{context[:3000]}\n```\n")
+
+        # Add recent conversation for continuity
+        # 압축된 이전 대화 요약 추가
+        if self.compressed_summary:
+            parts.append(f"\n## 이전 대화 요약 (압축됨)\n{self.compressed_summary[:2000]}\n")
+
+        # 최근 대화 추가 - deque 뒤쪽에서 최대 RECENT_MESSAGES_IN_PROMPT 개만 꺼냄 (앞부분 순회 없음)
+        if self.conversation_history:
+            recent = list(islice(reversed(self.conversation_history), RECENT_MESSAGES_IN_PROMPT))
+            if recent:
+                parts.append("\n## Recent Conversation\n")
+                for msg in reversed(recent):
+                    role = "User" if msg["role"] == "user" else "Assistant"
+                    content = msg["content"][:200]
+                    parts.append(f"**{role}**: {content}\n")
+
+        # 확인한 코드 심볼 정보 추가 (AST 파싱 결과)
+        symbol_summary = self._get_symbol_summary()
+        if symbol_summary:
+            parts.append(f"\n{symbol_summary}\n")
+
+        return "".join(parts)
+
+    def _get_ide_html(self) -> str:
+        """IDE HTML 반환 (외부 템플릿 파일 - mtime 이 바뀔 때만 다시 읽음)"""
+        try:
+            mtime = os.stat(IDE_TEMPLATE_PATH).st_mtime_ns
+            cached = self._ide_html_cache
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with open(IDE_TEMPLATE_PATH, 'r', encoding='utf-8', buffering=1 << 16) as f:
+                html = f.read()
+        except FileNotFoundError:
+            return IDE_HTML  # 폴백
+        self._ide_html_cache = (mtime, html)
+        return html
+
+    def run(self, host: str = "127.0.0.1", port: int = 8880, auto_shutdown: bool = True):
+        """서버 실행
+
+        Args:
+            host: 호스트 주소
+            port: 포트 번호
+            auto_shutdown: 브라우저 닫으면 자동 종료
+        """
+        import webbrowser
+        import threading
+        import time
+
+        # 워크스페이스 경로 표시 (긴 경로는 축약)
+        ws_display = self.workspace
+        if len(ws_display) > 50:
+            ws_display = "..." + ws_display[-47:]
+
+        print(f"""
+╔══════════════════════════════════════════════════════════════╗
+║                    MAEUM_CODE Web IDE                        ║
+╠══════════════════════════════════════════════════════════════╣
+║  🌐 URL: http://{host}:{port}                              ║
+║  📁 Workspace: {ws_display}
+║  🤖 AI Server: http://localhost:7860                        ║
+║  ⏹️  Ctrl+C 또는 브라우저 닫으면 종료                        ║
+╚══════════════════════════════════════════════════════════════╝
+""")
+
+        # 자동 종료 설정
+        if auto_shutdown:
+            self._setup_auto_shutdown()
+
+        # 브라우저 자동 열기
+        def open_browser():
+            time.sleep(0.8)
+            webbrowser.open(f"http://{host}:{port}")
+
+        threading.Thread(target=open_browser, daemon=True).start()
+
+        # 서버 실행
+        uvicorn.run(self.app, host=host, port=port, log_level="warning")
+
+    def _setup_auto_shutdown(self):
+        """브라우저 닫으면 자동 종료 설정
+
+        폴링 스레드 없이 WebSocket 연결/해제 시점에만 동작:
+        마지막 연결이 끊기면 타이머를 예약하고, 그 전에 다시 연결되면 취소
+        """
+        self._auto_shutdown = True
+        self._shutdown_timeout = 10  # 10초 후 종료
+        self._initial_grace_period = 15  # 시작 후 15초 동안은 종료 안함
+        self._server_start_time = time.monotonic()
+
+    def _schedule_auto_shutdown(self):
+        """연결이 모두 끊겼으면 종료 타이머 예약 (이벤트 루프에서 호출)"""
+        if not self._auto_shutdown or self.active_connections:
+            return
+        self._cancel_auto_shutdown()
+        # 초기 대기 시간 (브라우저 열릴 때까지) 이 남아 있으면 그 뒤로 미룸
+        grace_left = self._server_start_time + self._initial_grace_period - time.monotonic()
+        delay = max(self._shutdown_timeout, grace_left)
+        self._shutdown_handle = asyncio.get_running_loop().call_later(delay, self._auto_shutdown_now)
+
+    def _cancel_auto_shutdown(self):
+        """예약된 종료 타이머 취소 (새 연결)"""
+        if self._shutdown_handle is not None:
+            self._shutdown_handle.cancel()
+            self._shutdown_handle = None
+
+    def _auto_shutdown_now(self):
+        """종료 타이머 만료 - 그 사이 다시 연결됐으면 무시"""
+        self._shutdown_handle = None
+        if self.active_connections:
+            return
+        print("\n🛑 브라우저 연결 종료됨. 서버를 종료합니다...")
+        os._exit(0)
+
+
+# ============================================================
+# System Prompt (IDEServer._render_prompt_head)
+# ============================================================
+
+# Qwen-optimized System Prompt
+# Qwen responds well to: clear role, structured instructions, explicit tool format
+# 앞부분: 역할/규칙/환경 - {workspace}, {dir_tree} 만 채움
+PROMPT_HEADER_TEMPLATE = """# Role: MAEUM_CODE Assistant - The Curious Code Explorer
 
 You are MAEUM_CODE, an expert coding assistant with INFINITE CURIOSITY.
 Your core trait: You are OBSESSIVELY CURIOUS about every piece of code.
@@ -3436,7 +4821,7 @@ You have an insatiable desire to UNDERSTAND code deeply:
 6. **Same Language**: 사용자 언어로 답변 (한국어→한국어)
 
 ## Environment
-- Working Directory: {self.workspace}
+- Working Directory: {workspace}
 - Platform: MAEUM_CODE IDE (Local Web)
 
 ## Directory Structure
@@ -3444,14 +4829,17 @@ You have an insatiable desire to UNDERSTAND code deeply:
 {dir_tree}
 ```
 
-## Available Tools
+"""
+
+# 뒷부분: 도구 사용법/탐구 방법/예시 - 고정 텍스트 (format 대상 아님)
+PROMPT_TOOL_DOCS = """## Available Tools
 You can use these tools by outputting the exact format:
 
 ### 1. read_file - Read file content
 ```
 [TOOL:read_file]
 ```json
-{{"file_path": "path/to/file.py"}}
+{"file_path": "path/to/file.py"}
 ```
 ```
 
@@ -3459,7 +4847,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:list_dir]
 ```json
-{{"path": "src/"}}
+{"path": "src/"}
 ```
 ```
 
@@ -3467,7 +4855,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:search_code]
 ```json
-{{"query": "def main", "file_pattern": "*.py"}}
+{"query": "def main", "file_pattern": "*.py"}
 ```
 ```
 
@@ -3475,7 +4863,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:write_file]
 ```json
-{{"file_path": "new_file.py", "content": "# code here"}}
+{"file_path": "new_file.py", "content": "# code here"}
 ```
 ```
 
@@ -3483,7 +4871,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:edit_file]
 ```json
-{{"file_path": "file.py", "old_text": "old code", "new_text": "new code"}}
+{"file_path": "file.py", "old_text": "old code", "new_text": "new code"}
 ```
 ```
 
@@ -3491,7 +4879,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:bash]
 ```json
-{{"command": "ls -la"}}
+{"command": "ls -la"}
 ```
 ```
 
@@ -3499,11 +4887,11 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:todo_write]
 ```json
-{{"todos": [
-  {{"content": "파일 구조 분석", "status": "completed", "priority": "high"}},
-  {{"content": "핵심 함수 수정", "status": "in_progress", "priority": "high"}},
-  {{"content": "테스트 실행", "status": "pending", "priority": "medium"}}
-]}}
+{"todos": [
+  {"content": "파일 구조 분석", "status": "completed", "priority": "high"},
+  {"content": "핵심 함수 수정", "status": "in_progress", "priority": "high"},
+  {"content": "테스트 실행", "status": "pending", "priority": "medium"}
+]}
 ```
 ```
 
@@ -3511,7 +4899,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:read_project_memory]
 ```json
-{{}}
+{}
 ```
 ```
 
@@ -3519,7 +4907,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:update_project_memory]
 ```json
-{{"section": "decisions", "content": "API 응답 형식을 JSON으로 통일하기로 결정"}}
+{"section": "decisions", "content": "API 응답 형식을 JSON으로 통일하기로 결정"}
 ```
 ```
 
@@ -3527,7 +4915,7 @@ You can use these tools by outputting the exact format:
 ```
 [TOOL:plan_task]
 ```json
-{{"task": "인증 시스템 리팩토링", "files_to_examine": ["auth.py", "models.py", "routes.py"], "considerations": ["하위 호환성 유지", "테스트 커버리지 확인"]}}
+{"task": "인증 시스템 리팩토링", "files_to_examine": ["auth.py", "models.py", "routes.py"], "considerations": ["하위 호환성 유지", "테스트 커버리지 확인"]}
 ```
 ```
 
@@ -3588,21 +4976,21 @@ You can use these tools by outputting the exact format:
 
 [TOOL:list_dir]
 ```json
-{{"path": ""}}
+{"path": ""}
 ```
 
 main.py가 있네요. 어떤 구조인지 궁금합니다.
 
 [TOOL:read_file]
 ```json
-{{"file_path": "main.py"}}
+{"file_path": "main.py"}
 ```
 
 utils를 import 하네요. 이것도 봐야겠습니다.
 
 [TOOL:read_file]
 ```json
-{{"file_path": "utils.py"}}
+{"file_path": "utils.py"}
 ```
 ```
 
@@ -3612,137 +5000,6 @@ utils를 import 하네요. 이것도 봐야겠습니다.
 ### ✅ GOOD: 호기심 있는 탐구
 "main.py를 읽어보니 argparse를 사용하네요. CLI 도구입니다. 어떤 커맨드가 있는지 더 살펴보겠습니다."
 """
-        if task_mode:
-            base_prompt += f"\n## Current Task Mode: {task_mode}\n"
-
-        # 현재 열린 파일 정보 추가
-        if hasattr(self, 'current_file_info') and self.current_file_info:
-            cf = self.current_file_info
-            base_prompt += f"""
-## 📄 Currently Open File
-- **Path**: `{cf.get('path', 'unknown')}`
-- **Language**: {cf.get('language', 'unknown')}
-- **Total Lines**: {cf.get('totalLines', 0)}
-- **Cursor at Line**: {cf.get('cursorLine', 1)}
-
-**Important**: When the user says "이 파일", "여기", "이 코드" they mean THIS file.
-"""
-
-        # 열린 탭 목록 추가
-        if hasattr(self, 'open_tabs_info') and self.open_tabs_info:
-            tabs_list = ", ".join([f"`{t}`" for t in self.open_tabs_info[:10]])
-            base_prompt += f"\n## 📑 Open Tabs\n{tabs_list}\n"
-
-        if context:
-            base_prompt += f"\n## Current Code Context (around cursor)\n```\n{context[:3000]}\n```\n"
-
-        # Add recent conversation for continuity
-        # 압축된 이전 대화 요약 추가
-        if self.compressed_summary:
-            base_prompt += f"\n## 이전 대화 요약 (압축됨)\n{self.compressed_summary[:2000]}\n"
-
-        # 최근 대화 추가
-        if self.conversation_history:
-            recent = self.conversation_history[-4:]
-            if recent:
-                base_prompt += "\n## Recent Conversation\n"
-                for msg in recent:
-                    role = "User" if msg["role"] == "user" else "Assistant"
-                    content = msg["content"][:200]
-                    base_prompt += f"**{role}**: {content}\n"
-
-        # 확인한 코드 심볼 정보 추가 (AST 파싱 결과)
-        symbol_summary = self._get_symbol_summary()
-        if symbol_summary:
-            base_prompt += f"\n{symbol_summary}\n"
-
-        return base_prompt
-
-    def _get_ide_html(self) -> str:
-        """IDE HTML 반환"""
-        # 외부 템플릿 파일 사용
-        template_path = os.path.join(os.path.dirname(__file__), 'ide_template.html')
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return IDE_HTML  # 폴백
-
-    def run(self, host: str = "127.0.0.1", port: int = 8880, auto_shutdown: bool = True):
-        """서버 실행
-
-        Args:
-            host: 호스트 주소
-            port: 포트 번호
-            auto_shutdown: 브라우저 닫으면 자동 종료
-        """
-        import webbrowser
-        import threading
-        import time
-
-        # 워크스페이스 경로 표시 (긴 경로는 축약)
-        ws_display = self.workspace
-        if len(ws_display) > 50:
-            ws_display = "..." + ws_display[-47:]
-
-        print(f"""
-╔══════════════════════════════════════════════════════════════╗
-║                    MAEUM_CODE Web IDE                        ║
-╠══════════════════════════════════════════════════════════════╣
-║  🌐 URL: http://{host}:{port}                              ║
-║  📁 Workspace: {ws_display}
-║  🤖 AI Server: http://localhost:7860                        ║
-║  ⏹️  Ctrl+C 또는 브라우저 닫으면 종료                        ║
-╚══════════════════════════════════════════════════════════════╝
-""")
-
-        # 자동 종료 설정
-        if auto_shutdown:
-            self._setup_auto_shutdown()
-
-        # 브라우저 자동 열기
-        def open_browser():
-            time.sleep(0.8)
-            webbrowser.open(f"http://{host}:{port}")
-
-        threading.Thread(target=open_browser, daemon=True).start()
-
-        # 서버 실행
-        uvicorn.run(self.app, host=host, port=port, log_level="warning")
-
-    def _setup_auto_shutdown(self):
-        """브라우저 닫으면 자동 종료 설정"""
-        import threading
-        import time
-
-        self._last_activity = time.time()
-        self._shutdown_timeout = 10  # 10초 후 종료
-        self._initial_grace_period = 15  # 시작 후 15초 동안은 종료 안함
-        self._server_start_time = time.time()
-        self._had_connection = False  # 한 번이라도 연결된 적 있는지
-
-        # 연결 감시 스레드
-        def monitor_connections():
-            while True:
-                time.sleep(3)
-
-                # 초기 대기 시간 (브라우저 열릴 때까지)
-                if time.time() - self._server_start_time < self._initial_grace_period:
-                    continue
-
-                # 현재 연결 상태 확인
-                if len(self.active_connections) > 0:
-                    self._had_connection = True
-                    self._last_activity = time.time()
-                else:
-                    # 한 번이라도 연결된 적 있고, 지금 연결이 없으면 종료 체크
-                    if self._had_connection:
-                        if time.time() - self._last_activity > self._shutdown_timeout:
-                            print("\n🛑 브라우저 연결 종료됨. 서버를 종료합니다...")
-                            os._exit(0)
-
-        monitor_thread = threading.Thread(target=monitor_connections, daemon=True)
-        monitor_thread.start()
 
 
 # ============================================================